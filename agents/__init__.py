@@ -2,9 +2,25 @@
 Agents package for Automated EDA system
 """
 
-from .planner import PlannerAgent
-from .coder import CodeWriterAgent
-from .critic import CriticAgent
-from .reporter import ReporterAgent
-
 __all__ = ["PlannerAgent", "CodeWriterAgent", "CriticAgent", "ReporterAgent"]
+
+# Map each public name to its submodule for PEP 562 lazy loading; importing
+# the package no longer pulls in every agent (and the LLM client stack) when
+# only one of them is needed.
+_SUBMODULES = {
+    "PlannerAgent": "planner",
+    "CodeWriterAgent": "coder",
+    "CriticAgent": "critic",
+    "ReporterAgent": "reporter",
+}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        from importlib import import_module
+
+        module = import_module(f".{_SUBMODULES[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
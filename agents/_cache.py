@@ -0,0 +1,146 @@
+"""
+On-disk response cache for agent LLM calls
+"""
+
+import copy
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict
+
+# Cache directory for LLM responses; safe to delete at any time
+CACHE_DIR = "./.llm_cache"
+
+# Small in-process layer so repeated lookups within one run skip disk I/O
+_memory_cache: Dict[str, Dict[str, Any]] = {}
+_MEMORY_CACHE_MAX = 128
+
+# Process-wide switch so --no-cache runs bypass this cache too, not just
+# the client's SQLite response cache
+_enabled = True
+
+
+def set_cache_enabled(enabled: bool) -> None:
+    """Enable or disable the response cache for the whole process"""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def _cache_key(
+    prompt: str, model: str, temperature: float, system_prompt: str = None
+) -> str:
+    """Build a stable content-hash key for a prompt + model configuration"""
+    payload = json.dumps(
+        {
+            "prompt": prompt,
+            "model": model,
+            "temperature": temperature,
+            "system_prompt": system_prompt,
+        },
+        sort_keys=True,
+    )
+    # blake2b is faster than sha256 and collision resistance is ample here
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def cached_llm_call(
+    llm_call: Callable[..., Dict[str, Any]],
+    prompt: str,
+    model: str = "deepseek-chat",
+    temperature: float = 0.1,
+    system_prompt: str = None,
+) -> Dict[str, Any]:
+    """
+    Call the LLM through a content-addressed cache
+
+    Identical prompts (same model and temperature) are served from disk
+    without a network round-trip, which makes repeated runs on the same
+    CSV and critic-retry loops effectively free.
+
+    Args:
+        llm_call: Function taking the prompt (and optionally a system
+            prompt) and returning a response dict
+        prompt: User message for the LLM
+        model: Model name included in the cache key
+        temperature: Sampling temperature included in the cache key
+        system_prompt: Optional system message, forwarded to llm_call and
+            included in the cache key
+
+    Returns:
+        Response dict, either from cache or from the live call
+    """
+    if not _enabled:
+        if system_prompt is not None:
+            return llm_call(prompt, system_prompt)
+        return llm_call(prompt)
+
+    key = _cache_key(prompt, model, temperature, system_prompt)
+
+    # In-process hit. Hits hand out a deep copy: callers mutate responses
+    # in place (setdefault'd prompts, critic feedback written into plan
+    # items), and those edits must not leak into later cache hits
+    if key in _memory_cache:
+        return copy.deepcopy(_memory_cache[key])
+
+    # On-disk hit
+    cache_path = os.path.join(CACHE_DIR, f"{key}.json")
+    try:
+        with open(cache_path) as f:
+            response = json.load(f)
+        _remember(key, copy.deepcopy(response))
+        return response
+    except Exception:
+        pass
+
+    # Miss: issue the real call and store the result
+    if system_prompt is not None:
+        response = llm_call(prompt, system_prompt)
+    else:
+        response = llm_call(prompt)
+    if isinstance(response, dict):
+        # Store a private copy; the caller keeps (and may mutate) the
+        # original
+        _remember(key, copy.deepcopy(response))
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(cache_path, "w") as f:
+                json.dump(response, f)
+        except Exception:
+            # Caching is best-effort; never fail the pipeline over it
+            pass
+    return response
+
+
+# Memoized profile serializations, keyed by object identity. The pipeline
+# treats the profile as immutable once built, so identity is a safe key.
+# Each entry pins the object alongside its JSON: id() values are recycled
+# after collection, so a bare id -> string map could hand a new dict that
+# landed at a reused address the previous occupant's serialization.
+_dumps_cache: Dict[int, tuple] = {}
+_DUMPS_CACHE_MAX = 8
+
+
+def dumps_cached(obj: Any) -> str:
+    """
+    Serialize a dict to compact JSON, memoized by object identity
+
+    The same profile dict is embedded in planner, coder, and critic prompts
+    many times per run; this avoids re-encoding the identical (potentially
+    multi-KB) blob on every prompt build.
+    """
+    key = id(obj)
+    hit = _dumps_cache.get(key)
+    if hit is not None and hit[0] is obj:
+        return hit[1]
+    if len(_dumps_cache) >= _DUMPS_CACHE_MAX:
+        _dumps_cache.pop(next(iter(_dumps_cache)))
+    serialized = json.dumps(obj, separators=(",", ":"))
+    _dumps_cache[key] = (obj, serialized)
+    return serialized
+
+
+def _remember(key: str, response: Dict[str, Any]) -> None:
+    """Keep the response in the bounded in-process cache"""
+    if len(_memory_cache) >= _MEMORY_CACHE_MAX:
+        _memory_cache.pop(next(iter(_memory_cache)))
+    _memory_cache[key] = response
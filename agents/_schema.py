@@ -0,0 +1,79 @@
+"""
+Slotted dataclasses for the chart manifest schema shared by the agents
+"""
+
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass(slots=True)
+class Axis:
+    """Axis metadata for a single chart"""
+
+    x: str = "x"
+    y: str = "y"
+    log_x: bool = False
+    log_y: bool = False
+    x_ticks: int = 0
+    y_ticks: int = 0
+
+
+@dataclass(slots=True)
+class Encodings:
+    """Optional visual encodings for a chart"""
+
+    hue: Optional[str] = None
+    facet: Optional[str] = None
+
+
+@dataclass(slots=True)
+class Params:
+    """Plot parameters recorded in the manifest"""
+
+    bins: Optional[int] = 50
+    clip_quantiles: List[float] = field(default_factory=lambda: [0.01, 0.99])
+    rolling_window: Optional[int] = None
+
+
+@dataclass(slots=True)
+class ChartManifest:
+    """One chart entry in an item's manifest"""
+
+    saved_path: str
+    chart_type: str
+    columns_used: List[str]
+    n_rows_plotted: int = 0
+    axis: Axis = field(default_factory=Axis)
+    encodings: Encodings = field(default_factory=Encodings)
+    params: Params = field(default_factory=Params)
+    notes: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to the plain-dict shape the pipeline passes around"""
+        return asdict(self)
+
+
+@dataclass(slots=True, frozen=True)
+class Highlight:
+    """One successful analysis retained for the reporter
+
+    Slotted and frozen: the orchestrator may keep hundreds of these in the
+    in-memory execution log, and slots cut per-instance overhead roughly
+    threefold compared to a plain dict.
+    """
+
+    title: str
+    artifacts: Tuple[str, ...]
+    manifest: Dict[str, Any]
+    evidence: Dict[str, Any]
+    notes: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to the plain-dict shape reporter/demo consumers expect"""
+        return {
+            "title": self.title,
+            "artifacts": list(self.artifacts),
+            "manifest": self.manifest,
+            "evidence": self.evidence,
+            "notes": self.notes,
+        }
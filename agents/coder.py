@@ -1,17 +1,219 @@
 """
 Code Writer Agent - generates Python code for EDA visualizations
 """
+import copy
 import json
+from concurrent.futures import Future
+from functools import partial
 import os
 from datetime import datetime
-from typing import Dict, Any
-from llm.deepseek_client import DeepSeekClient
+from typing import TYPE_CHECKING, Dict, Any, List
+
+if TYPE_CHECKING:
+    from llm.deepseek_client import DeepSeekClient
+from ._cache import cached_llm_call, dumps_cached
+from ._schema import ChartManifest
+
+
+# Constant prompt fragments, frozen once at import so the composed prefix is
+# byte-identical on every call (a requirement for server-side prefix caching)
+_CODER_RULES = (
+    "No seaborn", "Label axes and titles", "Handle missing values",
+    "Use df already loaded", "Save PNG under save_dir; do not call plt.show()",
+    "NO imports of os, sys, pathlib, subprocess, or file operations",
+    "Use string concatenation for paths, not os.path.join()",
+    "Direct file paths only - no dynamic path construction",
+)
+_RULES_JSON = json.dumps(list(_CODER_RULES))
+_OUTPUT_CONTRACT = (
+    'Return {"title","python","expected_outputs":["...png"],"manifest_schema":{...}}'
+)
+
+# Static instruction block shared by every coder call. Keeping this text
+# byte-identical and at the very start of the prompt lets DeepSeek's prefix
+# cache hit across all plan items in a run; only the DYNAMIC tail varies.
+# The envelope is plain labeled lines, not JSON — the model only reads the
+# content, and skipping the encoder keeps the prefix cheap and deterministic.
+CODER_SYSTEM_PREFIX = """\
+role: coder
+step: code
+rules: """ + _RULES_JSON + """
+output_contract: """ + _OUTPUT_CONTRACT + """
+
+Write Python code to create the requested visualization. The code should:
+1. Use matplotlib (not seaborn)
+2. Handle missing values appropriately
+3. Add proper labels and titles
+4. Save plots to the save_dir given in the DYNAMIC section below
+5. Never call plt.show()
+6. ALWAYS create a manifest dictionary at the end with chart information
+7. NEVER import os, sys, pathlib, subprocess or any file system modules
+8. Use string concatenation for file paths like save_dir + '/filename.png'
+9. Only use provided modules: pd, np, plt, matplotlib, stats
+10. The manifest MUST follow this exact format:
+    manifest = {
+        "id": "item_id",
+        "charts": [
+            {
+                "saved_path": "full_path_to_saved_file.png",
+                "chart_type": "histogram",
+                "columns_used": ["column_name"],
+                "n_rows_plotted": number_of_rows,
+                "axis": {"x": "x_label", "y": "y_label", "log_x": False, "log_y": False, "x_ticks": 0, "y_ticks": 0},
+                "encodings": {"hue": None, "facet": None},
+                "params": {"bins": 50, "clip_quantiles": [0.01, 0.99], "rolling_window": None},
+                "notes": "description"
+            }
+        ]
+    }
+
+Return JSON with title, python code, expected_outputs, and manifest_schema.
+"""
+
+# Batch variant of the coder prefix: same rules, but the DYNAMIC section
+# carries an "items" array and the model returns one result per item.
+CODER_BATCH_SUFFIX = """\
+
+BATCH MODE: The DYNAMIC section contains an "items" array instead of a single
+"item". Write code for EVERY item, in the same order, and return:
+{"results": [{"title", "python", "expected_outputs": ["...png"], "manifest_schema": {...}}, ...]}
+The "results" array MUST have exactly one entry per input item.
+"""
+
+# Self-review variant of the coder prefix: the model drafts the code and
+# reviews it in the same turn, so the common "code is fine" path costs one
+# round-trip instead of a coder call followed by a critic call.
+CODER_SELF_REVIEW_SUFFIX = """\
+
+SELF-REVIEW MODE: After writing the code, review it yourself against the rules
+above (labels, missing values, manifest format, no forbidden imports) and return:
+{"code_output": {"title", "python", "expected_outputs": ["...png"], "manifest_schema": {...}},
+ "critique": {"status": "ok|fix", "fix_patch": "<if any>", "notes": "..."}}
+Set status "ok" only if the code needs no changes.
+"""
+
+# Fallback code templates, assembled once at import time from line lists so
+# each call pays a single str.format_map instead of rebuilding ~40-line
+# f-strings. Literal braces in the generated manifest dicts are escaped as
+# {{}}; only {col}, {item_id} and {save_dir} are substituted per call.
+
+
+def _manifest_lines(chart_type: str, x: str, y: str, x_ticks: str, bins: str) -> list:
+    """Manifest block shared by all fallback templates (import-time only)"""
+    return [
+        "# Create manifest",
+        "manifest = {{",
+        '    "id": "{item_id}",',
+        '    "charts": [',
+        "        {{",
+        '            "saved_path": "{save_dir}/fig_{item_id}_1.png",',
+        f'            "chart_type": "{chart_type}",',
+        '            "columns_used": ["{col}"],',
+        "            \"n_rows_plotted\": len(df['{col}'].dropna()),",
+        '            "axis": {{',
+        f'                "x": "{x}",',
+        f'                "y": "{y}",',
+        '                "log_x": False,',
+        '                "log_y": False,',
+        f'                "x_ticks": {x_ticks},',
+        '                "y_ticks": 0',
+        "            }},",
+        '            "encodings": {{',
+        '                "hue": None,',
+        '                "facet": None',
+        "            }},",
+        '            "params": {{',
+        f'                "bins": {bins},',
+        '                "clip_quantiles": [0.01, 0.99],',
+        '                "rolling_window": None',
+        "            }},",
+        '            "notes": f"NA dropped: {{df[\'{col}\'].isnull().sum() / len(df) * 100:.1f}}%"',
+        "        }}",
+        "    ]",
+        "}}",
+    ]
+
+
+_HIST_TMPL = "\n".join(
+    [
+        "import matplotlib.pyplot as plt",
+        "import numpy as np",
+        "",
+        "# Create histogram",
+        "fig, ax = plt.subplots(figsize=(10, 6))",
+        "ax.hist(df['{col}'].dropna(), bins=50, alpha=0.7, edgecolor='black')",
+        "ax.set_xlabel('{col}')",
+        "ax.set_ylabel('Frequency')",
+        "ax.set_title('Distribution of {col}')",
+        "plt.tight_layout()",
+        "plt.savefig('{save_dir}/fig_{item_id}_1.png', dpi=300, bbox_inches='tight')",
+        "plt.close()",
+        "",
+    ]
+    + _manifest_lines("histogram", "{col}", "Frequency", "50", "50")
+)
+
+_BOX_TMPL = "\n".join(
+    [
+        "import matplotlib.pyplot as plt",
+        "",
+        "# Create boxplot",
+        "fig, ax = plt.subplots(figsize=(10, 6))",
+        "ax.boxplot(df['{col}'].dropna())",
+        "ax.set_ylabel('{col}')",
+        "ax.set_title('Boxplot of {col}')",
+        "plt.tight_layout()",
+        "plt.savefig('{save_dir}/fig_{item_id}_1.png', dpi=300, bbox_inches='tight')",
+        "plt.close()",
+        "",
+    ]
+    + _manifest_lines("box", "Box", "{col}", "1", "None")
+)
+
+_BAR_TMPL = "\n".join(
+    [
+        "import matplotlib.pyplot as plt",
+        "",
+        "# Create bar plot",
+        "fig, ax = plt.subplots(figsize=(10, 6))",
+        "value_counts = df['{col}'].value_counts().head(10)",
+        "ax.bar(range(len(value_counts)), value_counts.values)",
+        "ax.set_xlabel('{col}')",
+        "ax.set_ylabel('Count')",
+        "ax.set_title('Top 10 values in {col}')",
+        "ax.set_xticks(range(len(value_counts)))",
+        "ax.set_xticklabels(value_counts.index, rotation=45)",
+        "plt.tight_layout()",
+        "plt.savefig('{save_dir}/fig_{item_id}_1.png', dpi=300, bbox_inches='tight')",
+        "plt.close()",
+        "",
+    ]
+    + _manifest_lines("bar", "{col}", "Count", "len(value_counts)", "None")
+)
+
+
+# Plot types the fallback templates cover well enough to skip the LLM
+_TRIVIAL_PLOTS = {"histogram", "boxplot", "bar"}
+
+# Frozen manifest-schema skeletons, one per fallback chart type. Each call
+# deep-copies and patches the varying fields instead of rebuilding the whole
+# nested dict, which matters when the fallback path is hit in bulk during an
+# LLM outage.
+_MANIFEST_TEMPLATES = {
+    chart_type: ChartManifest(
+        saved_path="",
+        chart_type=chart_type,
+        columns_used=[],
+        notes="Generated by fallback code",
+    ).to_dict()
+    for chart_type in sorted(_TRIVIAL_PLOTS)
+}
 
 
 class CodeWriterAgent:
     """Agent that writes Python code for EDA visualizations"""
 
-    def __init__(self, llm_client: DeepSeekClient):
+    def __init__(self, llm_client: "DeepSeekClient"):
         self.llm_client = llm_client
 
     def write_code(
@@ -40,75 +242,244 @@ class CodeWriterAgent:
             # Fallback to base save_dir if making the subdirectory fails
             timestamped_save_dir = save_dir
 
+        # Trivial single-column plots are covered by the local templates;
+        # skip the LLM round-trip entirely
+        if self._is_trivial(item):
+            return self._create_fallback_code(item, timestamped_save_dir)
+
         user_message = self._build_coder_prompt(item, profile, timestamped_save_dir)
 
         try:
-            response = self.llm_client.complete_with_system_prompt(user_message)
+            # Static instructions ride in the system message so the provider
+            # caches their prefill across items; only the user tail varies
+            response = cached_llm_call(
+                partial(
+                    self.llm_client.complete_with_system_prompt,
+                    schema_key="coder",
+                ),
+                user_message,
+                system_prompt=CODER_SYSTEM_PREFIX,
+            )
             return response
         except Exception as e:
             # Fallback to basic code if LLM fails
             return self._create_fallback_code(item, timestamped_save_dir)
 
+    def _is_trivial(self, item: Dict[str, Any]) -> bool:
+        """Check if a plan item is simple enough for the local templates"""
+        plots = item.get("plots") or []
+        columns = item.get("columns") or []
+        # Items with critic feedback go back to the LLM for a real fix
+        if "critic_feedback" in item:
+            return False
+        return (
+            len(columns) == 1
+            and bool(plots)
+            and set(plots).issubset(_TRIVIAL_PLOTS)
+        )
+
+    def write_code_async(
+        self,
+        item: Dict[str, Any],
+        profile: Dict[str, Any],
+        save_dir: str = "./artifacts",
+    ):
+        """
+        Non-blocking variant of write_code
+
+        Returns a concurrent.futures.Future so the caller can overlap
+        several items' network round-trips; concurrency is bounded by the
+        client's worker pool.
+
+        Args:
+            item: Single plan item from EDA plan
+            profile: Data profile
+            save_dir: Directory to save plots
+
+        Returns:
+            Future resolving to the code output dict
+        """
+        return self._submit(self.write_code, item, profile, save_dir)
+
+    def write_code_batch(
+        self,
+        items: List[Dict[str, Any]],
+        profile: Dict[str, Any],
+        save_dir: str = "./artifacts",
+    ) -> List[Dict[str, Any]]:
+        """
+        Write Python code for all plan items in a single LLM call
+
+        Sending the whole plan at once amortizes the shared profile/rules
+        prefill across N items and saves N-1 network round-trips compared to
+        calling write_code per item.
+
+        Args:
+            items: All plan items from the EDA plan
+            profile: Data profile
+            save_dir: Directory to save plots
+
+        Returns:
+            List of code outputs, one per item, in the same order
+        """
+        if not items:
+            return []
+
+        # Use timestamped directory to separate runs (shared by all items)
+        timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        timestamped_save_dir = f"{save_dir}/{timestamp}"
+        try:
+            os.makedirs(timestamped_save_dir, exist_ok=True)
+        except Exception:
+            timestamped_save_dir = save_dir
+
+        user_message = (
+            "DYNAMIC:\nprofile: "
+            + dumps_cached(profile)
+            + "\nitems: "
+            + json.dumps(items, separators=(",", ":"))
+            + "\nsave_dir: "
+            + timestamped_save_dir
+        )
+
+        try:
+            response = cached_llm_call(
+                self.llm_client.complete_with_system_prompt,
+                user_message,
+                system_prompt=CODER_SYSTEM_PREFIX + CODER_BATCH_SUFFIX,
+            )
+            results = response.get("results")
+            if isinstance(results, list) and len(results) == len(items):
+                return results
+        except Exception:
+            pass
+
+        # Schema mismatch or API failure: fall back to per-item calls
+        return [self.write_code(item, profile, save_dir) for item in items]
+
+    def write_and_self_critique(
+        self,
+        item: Dict[str, Any],
+        profile: Dict[str, Any],
+        save_dir: str = "./artifacts",
+    ) -> Dict[str, Any]:
+        """
+        Write code and self-review it in a single LLM call
+
+        Merges the coder and critic prompts so the common "code is fine"
+        path costs one round-trip; the orchestrator only consults the
+        separate critic when execution surfaces a problem.
+
+        Args:
+            item: Single plan item from EDA plan
+            profile: Data profile
+            save_dir: Directory to save plots
+
+        Returns:
+            Dict with "code_output" (same shape as write_code) and
+            "critique" (same shape as CriticAgent.critique)
+        """
+        timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        timestamped_save_dir = f"{save_dir}/{timestamp}"
+        try:
+            os.makedirs(timestamped_save_dir, exist_ok=True)
+        except Exception:
+            timestamped_save_dir = save_dir
+
+        # Template-covered items skip the LLM entirely, review included
+        if self._is_trivial(item):
+            return {
+                "code_output": self._create_fallback_code(item, timestamped_save_dir),
+                "critique": {
+                    "status": "ok",
+                    "fix_patch": "",
+                    "notes": "Local template; no review needed",
+                },
+            }
+
+        user_message = self._build_coder_prompt(item, profile, timestamped_save_dir)
+
+        try:
+            response = cached_llm_call(
+                self.llm_client.complete_with_system_prompt,
+                user_message,
+                system_prompt=CODER_SYSTEM_PREFIX + CODER_SELF_REVIEW_SUFFIX,
+            )
+            if isinstance(response.get("code_output"), dict) and isinstance(
+                response.get("critique"), dict
+            ):
+                return response
+            # Model returned a plain code object; treat the review as absent
+            if "python" in response:
+                return {
+                    "code_output": response,
+                    "critique": {
+                        "status": "ok",
+                        "fix_patch": "",
+                        "notes": "Model omitted self-review",
+                    },
+                }
+            raise ValueError("unexpected self-review response shape")
+        except Exception:
+            return {
+                "code_output": self._create_fallback_code(item, timestamped_save_dir),
+                "critique": {
+                    "status": "ok",
+                    "fix_patch": "",
+                    "notes": "Fallback code after LLM failure",
+                },
+            }
+
+    def write_and_self_critique_async(
+        self,
+        item: Dict[str, Any],
+        profile: Dict[str, Any],
+        save_dir: str = "./artifacts",
+    ):
+        """
+        Non-blocking variant of write_and_self_critique
+
+        Returns:
+            Future resolving to the combined code/critique dict
+        """
+        return self._submit(self.write_and_self_critique, item, profile, save_dir)
+
+    def _submit(self, fn, *args) -> "Future":
+        """
+        Submit work to the client's worker pool, degrading gracefully
+
+        In fallback mode (no LLM client) there is no pool; run the call
+        synchronously — fn produces fallback code in that case — and hand
+        back an already-resolved future so callers are none the wiser.
+        """
+        try:
+            return self.llm_client.submit(fn, *args)
+        except Exception:
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+
     def _build_coder_prompt(
         self, item: Dict[str, Any], profile: Dict[str, Any], save_dir: str
     ) -> str:
-        """Build the coder prompt"""
+        """Build the coder user message (the static prefix is the system prompt)"""
+        # Profile goes first in the dynamic tail (largest, most-reused blob);
+        # its serialization is memoized since it is identical for every item.
+        # Only the truly dynamic payloads are JSON-encoded; the envelope is
+        # plain labeled lines, which is cheaper and keeps key order fixed.
+        prompt = (
+            "DYNAMIC:\nprofile: "
+            + dumps_cached(profile)
+            + "\nitem: "
+            + json.dumps(item, separators=(",", ":"))
+            + "\nsave_dir: "
+            + save_dir
+        )
         # Include critic feedback if available
-        critic_context = ""
         if "critic_feedback" in item:
-            critic_context = f'''
-            "previous_attempt_feedback": {{
-                "error_details": {json.dumps(item["critic_feedback"])}
-            }},'''
-
-        prompt = f"""
-            {{
-            "role": "coder",
-            "step": "code",
-            "item": {json.dumps(item, indent=2)},
-            "profile": {json.dumps(profile, indent=2)},{critic_context}
-            "constraints": {{
-                "save_dir": "{save_dir}",
-                "rules": [
-                "No seaborn", "Label axes and titles", "Handle missing values",
-                "Use df already loaded", "Save PNG under save_dir; do not call plt.show()",
-                "NO imports of os, sys, pathlib, subprocess, or file operations",
-                "Use string concatenation for paths, not os.path.join()",
-                "Direct file paths only - no dynamic path construction"
-                ]
-            }},
-            "output_contract": "Return {{\\"title\\",\\"python\\",\\"expected_outputs\\":[\\"...png\\"],\\"manifest_schema\\":{{...}}}}"
-            }}
-
-            Write Python code to create the requested visualization. The code should:
-            1. Use matplotlib (not seaborn)
-            2. Handle missing values appropriately
-            3. Add proper labels and titles
-            4. Save plots to {save_dir} directory
-            5. Never call plt.show()
-            6. ALWAYS create a manifest dictionary at the end with chart information
-            7. NEVER import os, sys, pathlib, subprocess or any file system modules
-            8. Use string concatenation for file paths like '{save_dir}/filename.png'
-            9. Only use provided modules: pd, np, plt, matplotlib, stats
-            10. The manifest MUST follow this exact format:
-                manifest = {{
-                    "id": "item_id",
-                    "charts": [
-                        {{
-                            "saved_path": "full_path_to_saved_file.png",
-                            "chart_type": "histogram",
-                            "columns_used": ["column_name"],
-                            "n_rows_plotted": number_of_rows,
-                            "axis": {{"x": "x_label", "y": "y_label", "log_x": False, "log_y": False, "x_ticks": 0, "y_ticks": 0}},
-                            "encodings": {{"hue": None, "facet": None}},
-                            "params": {{"bins": 50, "clip_quantiles": [0.01, 0.99], "rolling_window": None}},
-                            "notes": "description"
-                        }}
-                    ]
-                }}
-
-            Return JSON with title, python code, expected_outputs, and manifest_schema.
-            """
+            prompt += "\nprevious_attempt_feedback: " + json.dumps(
+                item["critic_feedback"], separators=(",", ":")
+            )
         return prompt
 
     def _create_fallback_code(
@@ -121,177 +492,40 @@ class CodeWriterAgent:
         plots = item.get("plots", ["histogram"])
 
         # Generate basic code based on plot type
+        subs = {"col": columns[0] if columns else "unknown",
+                "item_id": item_id, "save_dir": save_dir}
         if "histogram" in plots and columns:
-            col = columns[0]
-            python_code = f"""
-                import matplotlib.pyplot as plt
-                import numpy as np
-
-                # Create histogram
-                fig, ax = plt.subplots(figsize=(10, 6))
-                ax.hist(df['{col}'].dropna(), bins=50, alpha=0.7, edgecolor='black')
-                ax.set_xlabel('{col}')
-                ax.set_ylabel('Frequency')
-                ax.set_title('Distribution of {col}')
-                plt.tight_layout()
-                plt.savefig('{save_dir}/fig_{item_id}_1.png', dpi=300, bbox_inches='tight')
-                plt.close()
-
-                # Create manifest
-                manifest = {{
-                    "id": "{item_id}",
-                    "charts": [
-                        {{
-                            "saved_path": "{save_dir}/fig_{item_id}_1.png",
-                            "chart_type": "histogram",
-                            "columns_used": ["{col}"],
-                            "n_rows_plotted": len(df['{col}'].dropna()),
-                            "axis": {{
-                                "x": "{col}",
-                                "y": "Frequency",
-                                "log_x": False,
-                                "log_y": False,
-                                "x_ticks": 50,
-                                "y_ticks": 0
-                            }},
-                            "encodings": {{
-                                "hue": None,
-                                "facet": None
-                            }},
-                            "params": {{
-                                "bins": 50,
-                                "clip_quantiles": [0.01, 0.99],
-                                "rolling_window": None
-                            }},
-                            "notes": f"NA dropped: {{df['{col}'].isnull().sum() / len(df) * 100:.1f}}%"
-                        }}
-                    ]
-                }}
-                """
+            python_code = _HIST_TMPL.format_map(subs)
         elif "boxplot" in plots and columns:
-            col = columns[0]
-            python_code = f"""
-                import matplotlib.pyplot as plt
-
-                # Create boxplot
-                fig, ax = plt.subplots(figsize=(10, 6))
-                ax.boxplot(df['{col}'].dropna())
-                ax.set_ylabel('{col}')
-                ax.set_title('Boxplot of {col}')
-                plt.tight_layout()
-                plt.savefig('{save_dir}/fig_{item_id}_1.png', dpi=300, bbox_inches='tight')
-                plt.close()
-
-                # Create manifest
-                manifest = {{
-                    "id": "{item_id}",
-                    "charts": [
-                        {{
-                            "saved_path": "{save_dir}/fig_{item_id}_1.png",
-                            "chart_type": "box",
-                            "columns_used": ["{col}"],
-                            "n_rows_plotted": len(df['{col}'].dropna()),
-                            "axis": {{
-                                "x": "Box",
-                                "y": "{col}",
-                                "log_x": False,
-                                "log_y": False,
-                                "x_ticks": 1,
-                                "y_ticks": 0
-                            }},
-                            "encodings": {{
-                                "hue": None,
-                                "facet": None
-                            }},
-                            "params": {{
-                                "bins": None,
-                                "clip_quantiles": [0.01, 0.99],
-                                "rolling_window": None
-                            }},
-                            "notes": f"NA dropped: {{df['{col}'].isnull().sum() / len(df) * 100:.1f}}%"
-                        }}
-                    ]
-                }}
-                """
+            python_code = _BOX_TMPL.format_map(subs)
         else:
             # Default to bar plot
-            col = columns[0] if columns else "unknown"
-            python_code = f"""
-                import matplotlib.pyplot as plt
-
-                # Create bar plot
-                fig, ax = plt.subplots(figsize=(10, 6))
-                value_counts = df['{col}'].value_counts().head(10)
-                ax.bar(range(len(value_counts)), value_counts.values)
-                ax.set_xlabel('{col}')
-                ax.set_ylabel('Count')
-                ax.set_title('Top 10 values in {col}')
-                ax.set_xticks(range(len(value_counts)))
-                ax.set_xticklabels(value_counts.index, rotation=45)
-                plt.tight_layout()
-                plt.savefig('{save_dir}/fig_{item_id}_1.png', dpi=300, bbox_inches='tight')
-                plt.close()
-
-                # Create manifest
-                manifest = {{
-                    "id": "{item_id}",
-                    "charts": [
-                        {{
-                            "saved_path": "{save_dir}/fig_{item_id}_1.png",
-                            "chart_type": "bar",
-                            "columns_used": ["{col}"],
-                            "n_rows_plotted": len(df['{col}'].dropna()),
-                            "axis": {{
-                                "x": "{col}",
-                                "y": "Count",
-                                "log_x": False,
-                                "log_y": False,
-                                "x_ticks": len(value_counts),
-                                "y_ticks": 0
-                            }},
-                            "encodings": {{
-                                "hue": None,
-                                "facet": None
-                            }},
-                            "params": {{
-                                "bins": None,
-                                "clip_quantiles": [0.01, 0.99],
-                                "rolling_window": None
-                            }},
-                            "notes": f"NA dropped: {{df['{col}'].isnull().sum() / len(df) * 100:.1f}}%"
-                        }}
-                    ]
-                }}
-                """
+            python_code = _BAR_TMPL.format_map(subs)
 
         return {
             "title": goal,
             "python": python_code,
             "expected_outputs": [f"{save_dir}/fig_{item_id}_1.png"],
-            "manifest_schema": {
-                "id": item_id,
-                "charts": [
-                    {
-                        "saved_path": f"{save_dir}/fig_{item_id}_1.png",
-                        "chart_type": plots[0] if plots else "bar",
-                        "columns_used": columns,
-                        "n_rows_plotted": 0,
-                        "axis": {
-                            "x": columns[0] if columns else "x",
-                            "y": "y",
-                            "log_x": False,
-                            "log_y": False,
-                            "x_ticks": 0,
-                            "y_ticks": 0,
-                        },
-                        "encodings": {"hue": None, "facet": None},
-                        "params": {
-                            "bins": 50,
-                            "clip_quantiles": [0.01, 0.99],
-                            "rolling_window": None,
-                        },
-                        "notes": "Generated by fallback code",
-                    }
-                ],
-            },
+            "manifest_schema": self._fallback_manifest_schema(
+                item_id, save_dir, plots[0] if plots else "bar", columns
+            ),
         }
+
+    def _fallback_manifest_schema(
+        self, item_id: str, save_dir: str, chart_type: str, columns: list
+    ) -> Dict[str, Any]:
+        """Build the manifest schema shared by all fallback code branches"""
+        template = _MANIFEST_TEMPLATES.get(chart_type)
+        if template is not None:
+            chart = copy.deepcopy(template)
+        else:
+            chart = ChartManifest(
+                saved_path="",
+                chart_type=chart_type,
+                columns_used=[],
+                notes="Generated by fallback code",
+            ).to_dict()
+        chart["saved_path"] = f"{save_dir}/fig_{item_id}_1.png"
+        chart["columns_used"] = columns
+        chart["axis"]["x"] = columns[0] if columns else "x"
+        return {"id": item_id, "charts": [chart]}
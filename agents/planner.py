@@ -2,15 +2,139 @@
 EDA Planner Agent - converts profile + user goal into prioritized EDA plan
 """
 
+import hashlib
 import json
-from typing import Dict, Any, List, Optional
-from llm.deepseek_client import DeepSeekClient
+from functools import partial
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+
+if TYPE_CHECKING:
+    from llm.deepseek_client import DeepSeekClient
+from ._cache import cached_llm_call, dumps_cached
+
+
+# Constant prompt fragments, frozen once at import so the composed prefix is
+# byte-identical on every call
+PLOT_TYPES = ("histogram", "boxplot", "line", "bar", "heatmap", "scatter")
+_OUTPUT_CONTRACT = 'Return {"eda_plan":[{id,goal,plots,priority,columns,notes}]}'
+
+# Static instruction block shared by every planner call. Kept byte-identical
+# and at the front of the prompt so DeepSeek's prefix cache can hit across
+# plan regenerations; the variable profile/samples/goal JSON comes last.
+# The envelope is plain labeled lines, not JSON — the model only reads the
+# content, and skipping the encoder keeps the prefix cheap and deterministic.
+PLANNER_SYSTEM_PREFIX = """\
+role: planner
+step: plan
+output_contract: """ + _OUTPUT_CONTRACT + """
+available_plot_types: """ + ", ".join(PLOT_TYPES) + """
+
+Based on the profile in the DYNAMIC section below, create a prioritized EDA plan. Focus on:
+1. Data quality issues (missing values, outliers)
+2. Distribution analysis for numeric columns
+3. Categorical analysis for non-numeric columns
+4. Relationships between variables
+5. Time series patterns if applicable
+6. Anomaly detection and unusual patterns
+7. Segmentation opportunities in the data
+8. Multivariate relationships and interaction effects
+9. Potential biases or imbalances in representation
+
+Guidance on visualization diversity:
+- Use a variety of plot types to avoid redundancy.
+- Histograms/boxplots → distributions and outliers
+- Bar charts → categorical frequencies and comparisons
+- Scatter plots → relationships between numeric variables
+- Line plots → time or ordered data
+- Heatmaps → correlations or matrix-style comparisons
+- Combine multiple plot types when appropriate for deeper insights.
+
+Available plot types: """ + ", ".join(PLOT_TYPES) + """
+
+If user_feedback is provided, treat it as authoritative guidance to refine or regenerate the plan. Address each point explicitly by adjusting items, priorities, plots, or columns so the new plan aligns with the feedback.
+
+Return a JSON object with an "eda_plan" array containing plan items.
+Each item should have: id, goal, plots, priority (1=highest), columns, notes.
+"""
+
+# Serialized-size budget for the sample rows embedded in the prompt; keeps
+# planner cost bounded even for very wide tables with long text fields
+_SAMPLE_BYTE_BUDGET = 1024
+_SAMPLE_STR_MAX = 64
+
+
+def _shrink_samples(samples, byte_budget: int = _SAMPLE_BYTE_BUDGET):
+    """
+    Trim sample rows to a serialized byte budget
+
+    Long string values are truncated to a fixed length and rows are dropped
+    once the running serialized size exceeds the budget, so a wide table
+    cannot blow the prompt up to thousands of tokens.
+    """
+    shrunk = []
+    used = 0
+    for row in samples:
+        slim = {
+            k: (v[:_SAMPLE_STR_MAX] + "…" if isinstance(v, str) and len(v) > _SAMPLE_STR_MAX else v)
+            for k, v in row.items()
+        }
+        used += len(json.dumps(slim, separators=(",", ":"), default=str))
+        if shrunk and used > byte_budget:
+            break
+        shrunk.append(slim)
+    return shrunk
+
+
+# Shrunk-and-serialized sample rows, memoized by list identity: the plan
+# approval loop passes the same sample_rows object into every regeneration,
+# so the shrink pass and JSON encode only run once per run
+_samples_memo: Dict[int, Any] = {}
+
+
+def _serialize_samples(data_samples: Optional[List[Dict[str, Any]]]) -> str:
+    """Shrink and serialize sample rows, memoized on the samples object"""
+    if not data_samples:
+        return "[]"
+    key = id(data_samples)
+    hit = _samples_memo.get(key)
+    if hit is not None and hit[0] is data_samples:
+        return hit[1]
+    serialized = json.dumps(
+        _shrink_samples(data_samples[:8]), separators=(",", ":"), default=str
+    )
+    if len(_samples_memo) >= 8:
+        _samples_memo.clear()
+    _samples_memo[key] = (data_samples, serialized)
+    return serialized
+
+
+def dedupe_plan_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Drop plan items that duplicate an earlier item's (plots, columns, goal)
+
+    Both LLM plans and the fallback plan occasionally repeat an item with a
+    different id; each duplicate would cost a full coder round-trip for the
+    same chart. Order is preserved and the first occurrence wins.
+    """
+    seen = set()
+    unique = []
+    for item in items:
+        key_src = json.dumps(
+            [item.get("plots"), item.get("columns"), item.get("goal")],
+            separators=(",", ":"),
+            default=str,
+        )
+        key = hashlib.blake2b(key_src.encode("utf-8"), digest_size=16).digest()
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(item)
+    return unique
 
 
 class PlannerAgent:
     """Agent that creates EDA plans based on data profile and user goals"""
 
-    def __init__(self, llm_client: DeepSeekClient):
+    def __init__(self, llm_client: "DeepSeekClient"):
         self.llm_client = llm_client
 
     def plan(
@@ -43,7 +167,16 @@ class PlannerAgent:
             pass
 
         try:
-            response = self.llm_client.complete_with_system_prompt(user_message)
+            # Static instructions ride in the system message so the provider
+            # caches their prefill across runs; only the user tail varies
+            response = cached_llm_call(
+                partial(
+                    self.llm_client.complete_with_system_prompt,
+                    schema_key="planner",
+                ),
+                user_message,
+                system_prompt=PLANNER_SYSTEM_PREFIX,
+            )
             if isinstance(response, dict):
                 response.setdefault("prompt", user_message)
             return response
@@ -56,51 +189,23 @@ class PlannerAgent:
     def _build_planner_prompt(
         self, profile: Dict[str, Any], user_goal: str, max_items: int, data_samples: Optional[List[Dict[str, Any]]] = None, user_feedback: Optional[str] = None
     ) -> str:
-        """Build the planner prompt"""
-        # Include up to 8 sample rows to give the planner concrete context
-        samples_json = json.dumps((data_samples or [])[:8], indent=2)
-        plot_types = ["histogram", "boxplot", "line", "bar", "heatmap", "scatter"]
-        feedback_section = f'"user_feedback": {json.dumps(user_feedback)} ,' if user_feedback else ''
-        prompt = f"""
-            {{
-            "role": "planner",
-            "step": "plan",
-            "profile": {json.dumps(profile, indent=2)},
-            "samples": {samples_json},
-            "user_goal": "{user_goal}",
-            {feedback_section}
-            "constraints": {{"max_items": {max_items}}},
-            "output_contract": "Return {{\"eda_plan\":[{{id,goal,plots,priority,columns,notes}}]}}",
-            "available_plot_types": {json.dumps(plot_types)}
-            }}
-            
-            Based on the profile above, create a prioritized EDA plan. Focus on:
-            1. Data quality issues (missing values, outliers)
-            2. Distribution analysis for numeric columns
-            3. Categorical analysis for non-numeric columns
-            4. Relationships between variables
-            5. Time series patterns if applicable
-            6. Anomaly detection and unusual patterns
-            7. Segmentation opportunities in the data
-            8. Multivariate relationships and interaction effects
-            9. Potential biases or imbalances in representation
-
-            Guidance on visualization diversity:
-            - Use a variety of plot types to avoid redundancy.
-            - Histograms/boxplots → distributions and outliers
-            - Bar charts → categorical frequencies and comparisons
-            - Scatter plots → relationships between numeric variables
-            - Line plots → time or ordered data
-            - Heatmaps → correlations or matrix-style comparisons
-            - Combine multiple plot types when appropriate for deeper insights.
-
-            Available plot types: {", ".join(plot_types)}
-
-            If user_feedback is provided, treat it as authoritative guidance to refine or regenerate the plan. Address each point explicitly by adjusting items, priorities, plots, or columns so the new plan aligns with the feedback.
-            
-            Return a JSON object with an "eda_plan" array containing plan items.
-            Each item should have: id, goal, plots, priority (1=highest), columns, notes.
-            """
+        """Build the planner user message (the static prefix is the system prompt)"""
+        # Profile first in the dynamic tail (largest, most-reused blob); its
+        # serialization is memoized since regenerations reuse the same dict.
+        # Only the truly dynamic payloads are JSON-encoded; the envelope is
+        # plain labeled lines, which is cheaper and keeps key order fixed.
+        prompt = (
+            "DYNAMIC:\nprofile: "
+            + dumps_cached(profile)
+            + "\nsamples: "
+            + _serialize_samples(data_samples)
+            + "\nuser_goal: "
+            + user_goal
+            + "\nmax_items: "
+            + str(max_items)
+        )
+        if user_feedback:
+            prompt += "\nuser_feedback: " + user_feedback
         return prompt
 
     def _create_fallback_plan(
@@ -175,4 +280,4 @@ class PlannerAgent:
                 }
             )
 
-        return {"eda_plan": plan_items[:max_items]}
+        return {"eda_plan": dedupe_plan_items(plan_items)[:max_items]}
@@ -32,6 +32,8 @@ def demo_without_llm():
     result = orchestrator.run_eda(
         csv_path="tests/sample.csv", user_goal="Demo EDA analysis", max_items=6
     )
+    # Flush background log writes before reporting paths
+    orchestrator.close()
 
     if result["success"]:
         print("\n🎉 Demo completed successfully!")
@@ -45,7 +47,7 @@ def demo_without_llm():
         for i, highlight in enumerate(result["highlights"][:3], 1):
             print(f"  {i}. {highlight['title']}")
             for artifact in highlight["artifacts"]:
-                filename = artifact.split("/")[-1]
+                filename = os.path.basename(artifact)
                 print(f"     📊 {filename}")
 
         print(f"\n🎯 Next Questions:")
@@ -82,6 +84,8 @@ def demo_with_llm():
         user_goal="Focus on transaction patterns and seasonality",
         max_items=8,
     )
+    # Flush background log writes before reporting paths
+    orchestrator.close()
 
     if result["success"]:
         print("\n🎉 LLM Demo completed successfully!")
@@ -2,16 +2,66 @@
 DeepSeek LLM client for JSON-only completions
 """
 
+import atexit
 import json
 import requests
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter, Retry
 from typing import Dict, Any, Optional
 
+from runtime.llm_cache import SQLiteLLMCache, cache_enabled
+
+try:
+    import jsonschema
+except ImportError:  # pragma: no cover - validation becomes a no-op
+    jsonschema = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# orjson parses the (often large) JSON response bodies several times faster
+# than stdlib json; fall back transparently when it is not installed
+_loads = orjson.loads if orjson is not None else json.loads
+
+# The repo ships one response schema per agent under prompts/; validators
+# are compiled once on first use and reused for every call
+_SCHEMA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prompts"
+)
+_validators: Dict[str, Any] = {}
+
+
+def _get_validator(schema_key: str):
+    """Load and cache the compiled validator for prompts/<key>.schema.json"""
+    if jsonschema is None:
+        return None
+    validator = _validators.get(schema_key)
+    if validator is None:
+        try:
+            with open(os.path.join(_SCHEMA_DIR, f"{schema_key}.schema.json")) as f:
+                schema = json.load(f)
+            validator = jsonschema.Draft7Validator(schema)
+        except Exception:
+            # Missing/broken schema file: skip validation rather than fail
+            validator = False
+        _validators[schema_key] = validator
+    return validator or None
+
 
 class DeepSeekClient:
     """Client for DeepSeek API with JSON-only response format"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    # Maximum in-flight requests; sized to the provider's concurrency limit
+    # and overridable per deployment via DEEPSEEK_MAX_CONCURRENCY
+    MAX_CONCURRENT_REQUESTS = int(os.getenv("DEEPSEEK_MAX_CONCURRENCY", "8"))
+
+    # Per-request timeout in seconds (connect + read)
+    REQUEST_TIMEOUT = 120
+
+    def __init__(self, api_key: Optional[str] = None, use_cache: Optional[bool] = None):
         self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
         if not self.api_key:
             raise ValueError(
@@ -23,14 +73,54 @@ class DeepSeekClient:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
         }
+        # Pooled session: reuses TCP+TLS connections across calls (each
+        # fresh handshake costs 1-2 RTT) and retries transient 429/5xx with
+        # exponential backoff. Pool size matches the worker pool so every
+        # concurrent request gets a keep-alive connection.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.MAX_CONCURRENT_REQUESTS * 2,
+            pool_maxsize=self.MAX_CONCURRENT_REQUESTS * 2,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["POST"],
+            ),
+        )
+        self.session.mount("https://", adapter)
+        self.session.headers.update(self.headers)
+        atexit.register(self.session.close)
 
-    def complete(self, messages: list, model: str = "deepseek-chat") -> Dict[str, Any]:
+        # Optional response cache (DEEPSEEK_CACHE_ENABLED=1, or forced
+        # on/off via use_cache): identical request payloads are served from
+        # SQLite instead of re-paying the network round-trip and token cost
+        if use_cache is None:
+            use_cache = cache_enabled()
+        self._response_cache = SQLiteLLMCache() if use_cache else None
+
+        # Bounded worker pool for the *_async variants; the pool size doubles
+        # as the concurrency semaphore for provider rate limits
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.MAX_CONCURRENT_REQUESTS,
+            thread_name_prefix="deepseek",
+        )
+
+    def complete(
+        self,
+        messages: list,
+        model: str = "deepseek-chat",
+        schema_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """
         Make a completion request with JSON response format
 
         Args:
             messages: List of message dicts with 'role' and 'content'
             model: Model name to use
+            schema_key: Optional name of a response schema under prompts/;
+                the parsed response is validated against it and repaired
+                with one cheap retry prompt on mismatch
 
         Returns:
             Parsed JSON response
@@ -42,9 +132,16 @@ class DeepSeekClient:
             "temperature": 0.1,
         }
 
+        if self._response_cache is not None:
+            prompt_repr = json.dumps(messages, separators=(",", ":"))
+            llm_string = f"{model}|json_object|0.1"
+            cached = self._response_cache.lookup(prompt_repr, llm_string)
+            if cached is not None:
+                return cached
+
         try:
-            response = requests.post(
-                self.base_url, headers=self.headers, json=payload
+            response = self.session.post(
+                self.base_url, json=payload, timeout=self.REQUEST_TIMEOUT
             )
             response.raise_for_status()
 
@@ -52,7 +149,12 @@ class DeepSeekClient:
             content = result["choices"][0]["message"]["content"]
 
             # Parse the JSON content
-            return json.loads(content)
+            parsed = _loads(content)
+            if schema_key is not None:
+                parsed = self._validate_or_repair(parsed, schema_key, model)
+            if self._response_cache is not None:
+                self._response_cache.update(prompt_repr, llm_string, parsed)
+            return parsed
 
         except requests.exceptions.RequestException as e:
             raise Exception(f"API request failed: {e}")
@@ -61,8 +163,42 @@ class DeepSeekClient:
         except KeyError as e:
             raise Exception(f"Unexpected response format: {e}")
 
+    def _validate_or_repair(
+        self, parsed: Dict[str, Any], schema_key: str, model: str
+    ) -> Dict[str, Any]:
+        """Validate a response against its schema, repairing once on mismatch"""
+        validator = _get_validator(schema_key)
+        if validator is None:
+            return parsed
+
+        errors = sorted(validator.iter_errors(parsed), key=str)
+        if not errors:
+            return parsed
+
+        # One-shot repair: echo the schema and the offending output back;
+        # cheaper than regenerating from the full agent prompt
+        repair_messages = [
+            {
+                "role": "user",
+                "content": (
+                    "Your previous JSON output did not match the required schema.\n"
+                    f"Schema: {json.dumps(validator.schema, separators=(',', ':'))}\n"
+                    f"Validation error: {errors[0].message}\n"
+                    f"Previous output: {json.dumps(parsed, separators=(',', ':'), default=str)}\n"
+                    "Return only corrected JSON matching the schema."
+                ),
+            }
+        ]
+        repaired = self.complete(repair_messages, model)
+        if not sorted(validator.iter_errors(repaired), key=str):
+            return repaired
+        raise Exception(
+            f"Response failed schema validation ({schema_key}): {errors[0].message}"
+        )
+
     def complete_with_system_prompt(
-        self, user_message: str, system_prompt: str = None
+        self, user_message: str, system_prompt: str = None,
+        schema_key: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Complete with system prompt
@@ -70,6 +206,7 @@ class DeepSeekClient:
         Args:
             user_message: User message content
             system_prompt: System prompt (uses default if None)
+            schema_key: Optional response schema name (see complete)
 
         Returns:
             Parsed JSON response
@@ -82,7 +219,112 @@ class DeepSeekClient:
             {"role": "user", "content": user_message},
         ]
 
-        return self.complete(messages)
+        return self.complete(messages, schema_key=schema_key)
+
+    def complete_stream(self, messages: list, model: str = "deepseek-chat"):
+        """
+        Stream a completion, yielding content chunks as they arrive
+
+        Lets callers surface first tokens (e.g. to a UI) or begin processing
+        the response before the full decode finishes, instead of waiting for
+        the whole response body.
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            model: Model name to use
+
+        Yields:
+            Content text fragments in arrival order
+        """
+        payload = {
+            "model": model,
+            "messages": messages,
+            "response_format": {"type": "json_object"},
+            "temperature": 0.1,
+            "stream": True,
+        }
+
+        try:
+            with self.session.post(
+                self.base_url, json=payload, stream=True,
+                timeout=self.REQUEST_TIMEOUT,
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    line = line.decode("utf-8")
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[len("data: "):]
+                    if data == "[DONE]":
+                        break
+                    chunk = _loads(data)
+                    delta = chunk["choices"][0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"API request failed: {e}")
+        except (json.JSONDecodeError, KeyError, IndexError) as e:
+            raise Exception(f"Unexpected streaming response format: {e}")
+
+    def complete_with_system_prompt_stream(
+        self, user_message: str, system_prompt: str = None
+    ):
+        """
+        Streaming variant of complete_with_system_prompt
+
+        Yields content chunks; accumulate them and json.loads the result to
+        get the same dict the non-streaming call returns.
+
+        Args:
+            user_message: User message content
+            system_prompt: System prompt (uses default if None)
+
+        Yields:
+            Content text fragments in arrival order
+        """
+        if system_prompt is None:
+            system_prompt = self._get_default_system_prompt()
+
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message},
+        ]
+
+        yield from self.complete_stream(messages)
+
+    def complete_with_system_prompt_async(
+        self, user_message: str, system_prompt: str = None
+    ) -> "Future[Dict[str, Any]]":
+        """
+        Non-blocking variant of complete_with_system_prompt
+
+        Submits the request to a bounded worker pool so callers can overlap
+        several network round-trips (e.g. one per plan item) instead of
+        paying each TTFT sequentially.
+
+        Args:
+            user_message: User message content
+            system_prompt: System prompt (uses default if None)
+
+        Returns:
+            Future resolving to the parsed JSON response
+        """
+        return self._pool.submit(
+            self.complete_with_system_prompt, user_message, system_prompt
+        )
+
+    def submit(self, fn, *args, **kwargs) -> "Future":
+        """
+        Run a callable on the client's bounded worker pool
+
+        Agents build their *_async variants on this so pool access stays
+        behind the client's public surface and total concurrency remains
+        capped by MAX_CONCURRENT_REQUESTS.
+        """
+        return self._pool.submit(fn, *args, **kwargs)
 
     def _get_default_system_prompt(self) -> str:
         """Get the default system prompt"""
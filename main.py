@@ -2,40 +2,271 @@
 Main orchestrator for Automated EDA & Visualization by Multi-Agent Chat
 """
 
+import ast
+import hashlib
+import mmap
 import os
+import select
 import sys
 import json
+import textwrap
+import time
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from llm.deepseek_client import DeepSeekClient
 from agents import PlannerAgent, CodeWriterAgent, CriticAgent, ReporterAgent
+from agents.planner import dedupe_plan_items
+from agents._cache import dumps_cached, set_cache_enabled
+from agents._schema import Highlight
 from runtime.profiler import CSVProfiler
 from runtime.executor import SandboxExecutor
+from runtime.executor_pool import PooledSandboxExecutor
 from runtime.history_db import HistoryDB
 
 
+# Directories already created by this process; lets sweep drivers that
+# build one orchestrator per CSV skip repeated mkdir syscalls
+_ENSURED_DIRS: set = set()
+
+
+def _ensure_dir(path: str) -> None:
+    """os.makedirs(exist_ok=True), memoized per process"""
+    if path not in _ENSURED_DIRS:
+        os.makedirs(path, exist_ok=True)
+        _ENSURED_DIRS.add(path)
+
+
+# Above this estimated row count the executor frame is sampled down instead
+# of materialized whole, keeping memory bounded for very large CSVs
+_LARGE_FILE_ROWS = 5_000_000
+
+
+def _row_estimate(path: str, sample_bytes: int = 1 << 20) -> int:
+    """Estimate the row count from newline density in the file's first MiB
+
+    Only the first sample_bytes are paged in and the newline count runs in
+    C (bytes.count), so the probe cost is flat regardless of file size.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            window = min(sample_bytes, size)
+            newlines = mm.read(window).count(b"\n")
+    if newlines == 0:
+        return 1
+    # Extrapolate and drop the header line
+    return max(int(newlines * (size / window)) - 1, 1)
+
+
+def _read_csv_compat(csv_path: str) -> pd.DataFrame:
+    """pandas read, preferring the multi-threaded pyarrow engine
+
+    The pyarrow engine parses in parallel and avoids object-dtype inference
+    for numeric columns, while still returning numpy-backed columns the
+    generated matplotlib code can consume unchanged. The classic C engine
+    remains the fallback for ragged or otherwise exotic CSVs it rejects.
+    """
+    try:
+        return pd.read_csv(csv_path, engine="pyarrow")
+    except Exception:
+        return pd.read_csv(csv_path)
+
+
+def _load_csv(csv_path: str) -> pd.DataFrame:
+    """Load a CSV into pandas, using pyarrow's parallel reader when available
+
+    Arrow's multi-threaded CSV reader parses large files roughly core-count
+    times faster than pandas' single-threaded C engine; the Table converts
+    to pandas once with self_destruct to avoid holding both copies. Files
+    estimated past _LARGE_FILE_ROWS are instead read in chunks and sampled
+    down to a representative frame so memory stays bounded; the profile is
+    computed separately by the profiler's own sampled pass.
+    """
+    est_rows = _row_estimate(csv_path)
+    if est_rows > _LARGE_FILE_ROWS:
+        frac = _LARGE_FILE_ROWS / est_rows
+        sampled = [
+            chunk.sample(frac=frac, random_state=42)
+            for chunk in pd.read_csv(csv_path, chunksize=1_000_000)
+        ]
+        return pd.concat(sampled, ignore_index=True)
+
+    # Optional Arrow-backed columns (EDA_ARROW_DTYPES=1): string columns
+    # stay dictionary-encoded Arrow buffers instead of Python objects,
+    # cutting memory on string-heavy files. Off by default because the
+    # generated plotting code is written against plain numpy dtypes and
+    # ArrowDtype columns behave subtly differently in matplotlib/groupby
+    if os.getenv("EDA_ARROW_DTYPES", "0").lower() in ("1", "true", "yes"):
+        try:
+            return pd.read_csv(
+                csv_path, engine="pyarrow", dtype_backend="pyarrow"
+            )
+        except Exception:
+            return _read_csv_compat(csv_path)
+    try:
+        import pyarrow.csv as pacsv
+    except ImportError:
+        return _read_csv_compat(csv_path)
+    try:
+        table = pacsv.read_csv(
+            csv_path,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=1 << 22),
+            convert_options=pacsv.ConvertOptions(strings_can_be_null=True),
+        )
+        return table.to_pandas(self_destruct=True)
+    except Exception:
+        # Arrow is stricter about ragged/odd CSVs; pandas stays the
+        # compatibility path
+        return _read_csv_compat(csv_path)
+
+
+# Object columns below this unique-value share are stored as category,
+# which collapses repeated strings to integer codes
+_CATEGORY_UNIQUE_FRAC = 0.05
+
+
+def _downcast_frame(df: pd.DataFrame, profile: Dict[str, Any]) -> pd.DataFrame:
+    """Narrow column dtypes using the profile computed in Step 1
+
+    Default CSV inference leaves everything int64/float64/object; the
+    profiler has already looked at every column, so numeric columns are
+    downcast to the narrowest safe width and low-cardinality string columns
+    become category. Halving (or better) the frame's footprint speeds up
+    the memory-bound groupby/plot operations in the generated EDA code.
+    """
+    rows = len(df)
+    for col_info in profile.get("columns", []):
+        name = col_info["name"]
+        if name not in df.columns:
+            continue
+        try:
+            series = df[name]
+            if col_info.get("numeric"):
+                if pd.api.types.is_integer_dtype(series):
+                    df[name] = pd.to_numeric(series, downcast="integer")
+                elif pd.api.types.is_float_dtype(series):
+                    df[name] = pd.to_numeric(series, downcast="float")
+            elif pd.api.types.is_string_dtype(series.dtype) and rows > 0:
+                # covers object and newer pandas' default str/string dtype
+                if series.nunique(dropna=True) / rows < _CATEGORY_UNIQUE_FRAC:
+                    df[name] = series.astype("category")
+        except Exception:
+            # Never fail the run over a dtype optimization
+            continue
+    return df
+
+
+# Hashes of code payloads already run through the indentation fixer, so
+# retries never re-fix (or re-run autopep8 on) the same source twice
+_FIX_ATTEMPTED: set = set()
+
+
+def _fix_indentation(code: str) -> Optional[str]:
+    """Repair indentation cheaply, falling back to autopep8
+
+    textwrap.dedent plus an ast.parse check handles the common "model
+    indented the whole block" failure in microseconds; autopep8's full
+    PEP 8 pass (multi-second on even small files) only runs when the fast
+    path still fails to parse. Returns None when the code was already
+    attempted or neither fixer produces valid syntax.
+    """
+    key = hashlib.blake2b(code.encode("utf-8"), digest_size=16).digest()
+    if key in _FIX_ATTEMPTED:
+        return None
+    _FIX_ATTEMPTED.add(key)
+
+    fixed = textwrap.dedent(code)
+    try:
+        ast.parse(fixed)
+        return fixed
+    except SyntaxError:
+        pass
+
+    try:
+        import autopep8
+
+        fixed = autopep8.fix_code(code)
+        ast.parse(fixed)
+        return fixed
+    except Exception:
+        return None
+
+
+def _prompt_with_timeout(prompt: str, timeout: Optional[float]) -> Optional[str]:
+    """Read a line from stdin, or return None once timeout elapses
+
+    Keeps scripted runs from stalling forever on the approval prompt: the
+    caller treats None (timeout) as consent while a typed empty line keeps
+    its usual meaning.
+    """
+    if timeout is None or timeout <= 0:
+        return input(prompt).strip()
+    print(prompt, end="", flush=True)
+    ready, _, _ = select.select([sys.stdin], [], [], timeout)
+    if not ready:
+        print()
+        return None
+    return sys.stdin.readline().strip()
+
+
+def _dump_log(obj: Dict[str, Any], f) -> None:
+    """Write a JSON log file, using orjson when available
+
+    The execution log embeds full LLM responses and evidence and can be
+    large; orjson serializes it several times faster than stdlib json and
+    handles numpy/pandas scalars without a custom encoder.
+    """
+    if orjson is not None:
+        f.write(
+            orjson.dumps(
+                obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+            ).decode()
+        )
+    else:
+        json.dump(obj, f, indent=2, default=str)
+
+
 class EDAOrchestrator:
     """Main orchestrator that coordinates all agents for EDA analysis"""
 
     def __init__(
-        self, api_key: Optional[str] = None, artifacts_dir: str = "./artifacts"
+        self,
+        api_key: Optional[str] = None,
+        artifacts_dir: str = "./artifacts",
+        use_cache: Optional[bool] = None,
+        debug_dump_json: bool = False,
     ):
         self.artifacts_dir = artifacts_dir
         self.logs_dir = "./logs"
         self.report_dir = "./report"
+        # Intermediate payloads go to the history DB; this flag additionally
+        # writes the legacy per-run JSON files for manual inspection
+        self.debug_dump_json = debug_dump_json
 
         # Ensure directories exist
-        os.makedirs(self.artifacts_dir, exist_ok=True)
-        os.makedirs(self.logs_dir, exist_ok=True)
-        os.makedirs(self.report_dir, exist_ok=True)
-
-        # Initialize components
-        self.llm_client = DeepSeekClient(api_key)
+        _ensure_dir(self.artifacts_dir)
+        _ensure_dir(self.logs_dir)
+        _ensure_dir(self.report_dir)
+
+        # Initialize components. --no-cache must defeat both layers: the
+        # client's SQLite response cache and the agents' prompt cache
+        if use_cache is not None:
+            set_cache_enabled(use_cache)
+        self.llm_client = DeepSeekClient(api_key, use_cache=use_cache)
         self.profiler = CSVProfiler()
         self.executor = SandboxExecutor(artifacts_dir)
         self.history_db = HistoryDB(os.path.join(self.logs_dir, "history.db"))
@@ -46,6 +277,11 @@ class EDAOrchestrator:
         self.critic = CriticAgent(self.llm_client)
         self.reporter = ReporterAgent(self.llm_client)
 
+        # Background writer for large log files, so returning a result does
+        # not block on serializing/flushing hundreds of MB of execution log
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="eda-io")
+        self._pending_io: List = []
+
         # Execution log
         self.execution_log = {
             "timestamp": datetime.now().isoformat(),
@@ -55,8 +291,43 @@ class EDAOrchestrator:
             "final_report": {},
         }
 
+    def _write_log(self, path: str, obj: Dict[str, Any]) -> None:
+        """Serialize a log dict to path atomically (runs on the I/O pool)"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            _dump_log(obj, f)
+        os.replace(tmp_path, path)
+
+    def _debug_dump(self, run_dir: str, name: str, payload: Any) -> None:
+        """Write a legacy per-run debug file when --debug-dump-json is set"""
+        if not self.debug_dump_json:
+            return
+        with open(os.path.join(run_dir, name), "w") as f:
+            if isinstance(payload, str):
+                f.write(payload)
+            else:
+                _dump_log(payload, f)
+
+    def close(self) -> None:
+        """Flush pending background writes and shut down the I/O pool"""
+        if self._pending_io:
+            wait(self._pending_io)
+            self._pending_io.clear()
+        self._io_pool.shutdown(wait=True)
+
+    def __enter__(self) -> "EDAOrchestrator":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
     def run_eda(
-        self, csv_path: str, user_goal: str = "General EDA", max_items: int = 8
+        self,
+        csv_path: str,
+        user_goal: str = "General EDA",
+        max_items: int = 8,
+        auto_approve: bool = False,
+        approval_timeout: Optional[float] = None,
     ) -> Dict[str, Any]:
         """
         Run complete EDA analysis pipeline
@@ -65,6 +336,9 @@ class EDAOrchestrator:
             csv_path: Path to CSV file
             user_goal: User's analysis goal
             max_items: Maximum number of EDA items
+            auto_approve: Skip the interactive plan review entirely
+            approval_timeout: Seconds to wait at the approval prompt before
+                treating silence as approval (None waits indefinitely)
 
         Returns:
             Complete execution results
@@ -77,48 +351,109 @@ class EDAOrchestrator:
             session_id = self.history_db.start_session(csv_path, user_goal, max_items)
             
             # Prepare per-run log directory
-            run_ts = datetime.now().strftime('%Y%m%d-%H%M%S')
+            # One wall-clock read names the run and stamps the log; the
+            # monotonic origin feeds duration measurements (immune to
+            # clock adjustments mid-run)
+            run_started = time.monotonic()
+            started_at = datetime.now()
+            self.execution_log["timestamp"] = started_at.isoformat()
+            run_ts = started_at.strftime('%Y%m%d-%H%M%S')
             run_dir = os.path.join(self.logs_dir, f"run-{run_ts}")
             os.makedirs(run_dir, exist_ok=True)
-            # Step 1: Profile the data
-            print("\n📋 Step 1: Profiling data...")
-            profile = self.profiler.profile(csv_path)
+            # Step 1: Load data for execution
+            print("\n📂 Step 1: Loading data...")
+            df = _load_csv(csv_path)
+            print(f"✅ Loaded DataFrame: {df.shape}")
+
+            # Step 2: Profile the loaded frame; profiling the DataFrame
+            # instead of the path means the CSV is read (and parsed) once
+            # per run rather than once by the profiler and once here
+            print("\n📋 Step 2: Profiling data...")
+            profile = self.profiler.profile(df)
             self.execution_log["profile"] = profile
+            # Warm the shared serialization memo once; every agent prompt
+            # below embeds this same string instead of re-encoding the dict
+            dumps_cached(profile)
             print(f"✅ Profiled {profile['rows_total']} rows, {len(profile['columns'])} columns")
 
             # Save profile
-            with open(os.path.join(run_dir, "profile.json"), 'w') as f:
-                json.dump(profile, f, indent=2)
-            
-            # Step 2: Load data for execution
-            print("\n📂 Step 2: Loading data...")
-            df = pd.read_csv(csv_path)
-            print(f"✅ Loaded DataFrame: {df.shape}")
+            self.history_db.log_artifact(session_id, None, "profile", profile)
+            self._debug_dump(run_dir, "profile.json", profile)
+
+            # Peek-then-type: the profile already knows each column's shape,
+            # so narrow dtypes before the frame fans out to item execution
+            df = _downcast_frame(df, profile)
+
+            # Optional process-pool backend (EDA_PROCESS_POOL=1): the frame
+            # is written once as Arrow/feather (pickle fallback for exotic
+            # dtypes) and each worker loads it at boot, so per-item calls
+            # ship only the code string instead of re-pickling the frame
+            pool = None
+            if os.getenv("EDA_PROCESS_POOL", "0").lower() in ("1", "true", "yes"):
+                try:
+                    df_path = os.path.join(run_dir, "df.feather")
+                    df.to_feather(df_path)
+                except Exception:
+                    df_path = os.path.join(run_dir, "df.pkl")
+                    df.to_pickle(df_path)
+                pool = PooledSandboxExecutor(
+                    df_path, self.artifacts_dir, timeout=self.executor.timeout
+                )
+
+            def _run_code(code: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+                if pool is not None:
+                    return pool.execute(code, schema)
+                return self.executor.execute(code, df, schema)
 
             # Step 3: Plan EDA
             print("\n🎯 Step 3: Planning EDA...")
             # Provide a small random sample of rows to the planner for better grounding
             try:
-                sample_rows = df.sample(n=min(8, len(df)), random_state=42).to_dict(orient='records')
+                # Positional take of a handful of random rows: iloc on
+                # integer positions skips df.sample's index machinery, and
+                # to_dict only ever touches the 8-row slice
+                n_rows = min(8, len(df))
+                if n_rows:
+                    positions = np.random.default_rng(42).choice(
+                        len(df), size=n_rows, replace=False
+                    )
+                    sample_rows = df.iloc[positions].to_dict(orient='records')
+                else:
+                    sample_rows = []
             except Exception:
                 sample_rows = []
             eda_plan_resp = self.planner.plan(profile, user_goal, max_items, data_samples=sample_rows)
-            self.execution_log["eda_plan"] = eda_plan_resp.get("eda_plan", [])
+            # Drop duplicate items up front so they never reach the coder
+            self.execution_log["eda_plan"] = dedupe_plan_items(eda_plan_resp.get("eda_plan", []))
             print(f"✅ Created plan with {len(self.execution_log['eda_plan'])} items")
 
             # Save planner output and prompt
-            with open(os.path.join(run_dir, "plan.json"), 'w') as f:
-                json.dump(eda_plan_resp, f, indent=2)
+            plan_artifacts = {"plan": eda_plan_resp}
             if eda_plan_resp.get("prompt"):
-                with open(os.path.join(run_dir, "planner_prompt.txt"), 'w') as f:
-                    f.write(eda_plan_resp["prompt"])
-            
-            # NEW: Ask for user approval before proceeding
+                plan_artifacts["planner_prompt"] = eda_plan_resp["prompt"]
+                self._debug_dump(run_dir, "planner_prompt.txt", eda_plan_resp["prompt"])
+            self.history_db.log_artifacts(session_id, None, plan_artifacts)
+            self._debug_dump(run_dir, "plan.json", eda_plan_resp)
+
+
+            # NEW: Ask for user approval before proceeding; scripted runs
+            # skip the prompt (--yes) or bound it (--approval-timeout)
             while True:
                 print("\n🛑 Review the proposed EDA plan:")
                 for i, item in enumerate(self.execution_log["eda_plan"], 1):
                     print(f"  {i}. id={item.get('id')} priority={item.get('priority')} goal={item.get('goal')} plots={','.join(item.get('plots', []))} columns={','.join(item.get('columns', []))}")
-                approve = input("\nDo you approve this plan? (y/n): ").strip().lower()
+                if auto_approve:
+                    print("✅ Auto-approving plan (--yes)")
+                    approve = "y"
+                else:
+                    approve = _prompt_with_timeout(
+                        "\nDo you approve this plan? (y/n): ", approval_timeout
+                    )
+                    if approve is None:
+                        print("⏳ No response before timeout; approving plan")
+                        approve = "y"
+                    else:
+                        approve = approve.lower()
                 if approve in ("y", "yes"):
                     # Save approved plan version
                     self.history_db.save_plan_version(
@@ -142,7 +477,7 @@ class EDAOrchestrator:
                     break
                 print("\n🔄 Regenerating plan based on your feedback...")
                 eda_plan_resp = self.planner.plan(profile, user_goal, max_items, data_samples=sample_rows, user_feedback=reasons)
-                self.execution_log["eda_plan"] = eda_plan_resp.get("eda_plan", [])
+                self.execution_log["eda_plan"] = dedupe_plan_items(eda_plan_resp.get("eda_plan", []))
                 # Save the new plan version
                 self.history_db.save_plan_version(
                     session_id,
@@ -150,164 +485,256 @@ class EDAOrchestrator:
                     plan_items=self.execution_log["eda_plan"],
                     user_feedback=reasons
                 )
-                with open(os.path.join(run_dir, "plan.json"), 'w') as f:
-                    json.dump(eda_plan_resp, f, indent=2)
+                plan_artifacts = {"plan": eda_plan_resp}
                 if eda_plan_resp.get("prompt"):
-                    with open(os.path.join(run_dir, "planner_prompt.txt"), 'w') as f:
-                        f.write(eda_plan_resp["prompt"])
+                    plan_artifacts["planner_prompt"] = eda_plan_resp["prompt"]
+                    self._debug_dump(
+                        run_dir, "planner_prompt.txt", eda_plan_resp["prompt"]
+                    )
+                self.history_db.log_artifacts(session_id, None, plan_artifacts)
+                self._debug_dump(run_dir, "plan.json", eda_plan_resp)
 
             # Step 4: Execute each plan item
             print("\n🔧 Step 4: Executing analysis...")
             highlights = []
 
-            for i, item in enumerate(self.execution_log["eda_plan"], 1):
-                print(
-                    f"  📊 Processing item {i}/{len(self.execution_log['eda_plan'])}: {item.get('id', 'unknown')}"
+            # Generate code for the whole plan in one batched LLM call when
+            # there are several items: the shared profile/rules prefill is
+            # paid once inside a single request instead of per item. On a
+            # schema mismatch (or a single-item plan) fall back to fanning
+            # out per-item coder calls on the client's bounded worker pool,
+            # consumed in plan order below. Execution stays sequential
+            # because the sandbox shares matplotlib global state.
+            plan_items = self.execution_log["eda_plan"]
+            code_bundles = None
+            if len(plan_items) > 1:
+                batch_codes = self.coder.write_code_batch(
+                    plan_items, profile, self.artifacts_dir
                 )
+                if len(batch_codes) == len(plan_items):
+                    code_bundles = [
+                        {
+                            "code_output": code_output,
+                            "critique": {
+                                "status": "ok",
+                                "fix_patch": "",
+                                "notes": "Batch mode; critic runs on failure only",
+                            },
+                        }
+                        for code_output in batch_codes
+                    ]
+            code_futures = (
+                [
+                    self.coder.write_and_self_critique_async(
+                        item, profile, self.artifacts_dir
+                    )
+                    for item in plan_items
+                ]
+                if code_bundles is None
+                else None
+            )
 
-                # Generate code
-                code_output = self.coder.write_code(item, profile, self.artifacts_dir)
-                # Save code writer output
-                item_id = item.get('id', f'item_{i}')
-                with open(os.path.join(run_dir, f"code_{item_id}.json"), 'w') as f:
-                    json.dump(code_output, f, indent=2)
-                
-                # Execute code
-                exec_result = self.executor.execute(
-                    code_output["python"], df, code_output["manifest_schema"]
-                )
-                # Save executor result
-                with open(os.path.join(run_dir, f"exec_{item_id}.json"), 'w') as f:
-                    json.dump(exec_result, f, indent=2)
-                
-                # Critique and potentially fix
-                critique_result = self.critic.critique(code_output, exec_result)
-                # Save critic output
-                with open(os.path.join(run_dir, f"critic_{item_id}.json"), 'w') as f:
-                    json.dump(critique_result, f, indent=2)
-                
-                # If fix needed, try again
-                if critique_result["status"] == "fix" and critique_result.get(
-                    "fix_patch"
-                ):
-                    print(f"    🔧 Applying fix...")
-                    fixed_code = code_output["python"] + "\n" + critique_result["fix_patch"]
-                    exec_result = self.executor.execute(fixed_code, df, code_output["manifest_schema"])
-                    # Save post-fix executor result
-                    with open(os.path.join(run_dir, f"exec_{item_id}_after_fix.json"), 'w') as f:
-                        json.dump(exec_result, f, indent=2)
-                
-                # Store results
-                exec_summary = {
-                    "item": item,
-                    "code_output": code_output,
-                    "exec_result": exec_result,
-                    "critique_result": critique_result,
-                }
-                self.execution_log["exec_results"].append(exec_summary)
-                
-                # Save execution result to history DB
-                self.history_db.save_execution_result(
-                    session_id=session_id,
-                    item_id=item.get('id', f'item_{i}'),
-                    code_output=code_output,
-                    exec_result=exec_result,
-                    critique_result=critique_result,
-                    success=exec_result.get("exec_ok", False),
-                    retry_count=retry_count,
-                    error=exec_result.get("error")
-                )
+            # One write transaction covers the whole item loop: the
+            # per-item artifact batches and execution rows commit (and
+            # fsync) once at the end instead of twice per item
+            with self.history_db.session_txn():
+                for i, item in enumerate(plan_items, 1):
+                    print(
+                        f"  📊 Processing item {i}/{len(plan_items)}: {item.get('id', 'unknown')}"
+                    )
+                    item_started = time.monotonic()
 
-                # Create highlight for reporter
-                # Try to execute the code with retries if needed
-                max_retries = 3
-                retry_count = 0
-                success = False
-
-                while retry_count < max_retries and not success:
-                    if retry_count > 0:
-                        print(f"    🔄 Retry attempt {retry_count}/{max_retries}...")
-
-                    if exec_result["exec_ok"]:
-                        highlight = {
-                            "title": code_output["title"],
-                            "artifacts": code_output["expected_outputs"],
-                            "manifest": exec_result["manifest"],
-                            "evidence": exec_result["evidence"],
-                            "notes": exec_result["stdout"]
-                            or "Analysis completed successfully",
-                        }
-                        highlights.append(highlight)
-                        print(
-                            f"    ✅ Success: {len(code_output['expected_outputs'])} plots generated"
-                        )
-                        success = True
+                    # Collect this item's code (batched or prefetched, plan order)
+                    if code_bundles is not None:
+                        code_bundle = code_bundles[i - 1]
                     else:
-                        error_msg = exec_result.get('error', 'Unknown error')
-                        print(f"    ⚠️ Failed: {error_msg}")
-                        
-                        # Check if it's an indentation error
-                        if "IndentationError" in error_msg or "unexpected indent" in error_msg:
-                            try:
-                                import autopep8
-                                print(f"    🔧 Attempting to fix indentation with autopep8...")
-                                # Fix indentation using autopep8
-                                fixed_code = autopep8.fix_code(code_output["python"])
-                                # Try executing the fixed code
-                                exec_result = self.executor.execute(
-                                    fixed_code, df, code_output["manifest_schema"]
+                        code_bundle = code_futures[i - 1].result()
+                    code_output = code_bundle["code_output"]
+                    self_review = code_bundle["critique"]
+                    # Collect this item's payloads; they are written to the
+                    # history DB in one transaction after the retry loop
+                    item_id = item.get('id', f'item_{i}')
+                    item_artifacts = {"code": code_output}
+                    self._debug_dump(run_dir, f"code_{item_id}.json", code_output)
+
+                    # Execute the item with retries; every attempt runs exactly
+                    # once inside this loop (the old pre-loop execute/critique
+                    # pass ran each item's code twice on the happy path)
+                    max_retries = 3
+                    retry_count = 0
+                    success = False
+                    exec_result = None
+                    critique_result = None
+
+                    while retry_count < max_retries and not success:
+                        if retry_count > 0:
+                            print(f"    🔄 Retry attempt {retry_count}/{max_retries}...")
+
+                        if exec_result is None:
+                            # First execution of this item's code
+                            exec_result = _run_code(
+                                code_output["python"], code_output["manifest_schema"]
+                            )
+                            item_artifacts["exec"] = exec_result
+                            self._debug_dump(run_dir, f"exec_{item_id}.json", exec_result)
+
+                        if exec_result["exec_ok"]:
+                            # A clean execution with a clean self-review skips
+                            # the separate critic round-trip
+                            if self_review.get("status") == "ok":
+                                critique_result = self_review
+                            else:
+                                critique_result = self.critic.critique(
+                                    code_output, exec_result
                                 )
-                                retry_count += 1
-                                continue
-                            except Exception as e:
-                                print(f"    ❌ Autopep8 fix failed: {str(e)}")
-                                # Fall through to critic logic since autopep8 failed
-                        
-                        # For non-indentation errors OR when autopep8 fails, use the critic
-                        critique_result = self.critic.critique(code_output, exec_result)
-                        
-                        if critique_result["status"] == "fix":
-                            print(f"    🔧 Generating new code based on critic's feedback...")
-                            # Get new code from CodeWriter with critic's feedback
-                            item["critic_feedback"] = critique_result["notes"]  # Add critic's feedback to help generate better code
-                            code_output = self.coder.write_code(item, profile, self.artifacts_dir)
-                            exec_result = self.executor.execute(
-                                code_output["python"], df, code_output["manifest_schema"]
+                            highlight = Highlight(
+                                title=code_output["title"],
+                                artifacts=tuple(code_output["expected_outputs"]),
+                                manifest=exec_result["manifest"],
+                                evidence=exec_result["evidence"],
+                                notes=exec_result["stdout"]
+                                or "Analysis completed successfully",
                             )
-                            retry_count += 1
+                            highlights.append(highlight)
+                            print(
+                                f"    ✅ Success: {len(code_output['expected_outputs'])} plots generated"
+                            )
+                            success = True
                         else:
-                            print(f"    ❌ Critic could not determine how to fix")
-                            break
+                            error_msg = exec_result.get('error', 'Unknown error')
+                            print(f"    ⚠️ Failed: {error_msg}")
+
+                            # Check if it's an indentation error
+                            if "IndentationError" in error_msg or "unexpected indent" in error_msg:
+                                print(f"    🔧 Attempting to fix indentation...")
+                                fixed_code = _fix_indentation(code_output["python"])
+                                if fixed_code is not None:
+                                    # Try executing the fixed code
+                                    exec_result = _run_code(
+                                        fixed_code, code_output["manifest_schema"]
+                                    )
+                                    item_artifacts[f"exec_retry_{retry_count + 1}"] = exec_result
+                                    retry_count += 1
+                                    continue
+                                print(f"    ❌ Indentation fix failed")
+                                # Fall through to critic logic
+
+                            # For non-indentation errors OR when the fixer fails, use the critic
+                            critique_result = self.critic.critique(code_output, exec_result)
+
+                            if critique_result["status"] == "fix":
+                                print(f"    🔧 Generating new code based on critic's feedback...")
+                                # Get new code from CodeWriter with critic's feedback
+                                item["critic_feedback"] = critique_result["notes"]  # Add critic's feedback to help generate better code
+                                code_output = self.coder.write_code(item, profile, self.artifacts_dir)
+                                item_artifacts["code"] = code_output
+                                exec_result = _run_code(
+                                    code_output["python"], code_output["manifest_schema"]
+                                )
+                                item_artifacts[f"exec_retry_{retry_count + 1}"] = exec_result
+                                retry_count += 1
+                            else:
+                                print(f"    ❌ Critic could not determine how to fix")
+                                break
+
+                    if not success:
+                        print(f"    ❌ Failed after {retry_count} retries")
+                    if critique_result is None:
+                        # Retries exhausted without a critic verdict (e.g. the
+                        # autopep8 path looped until the budget ran out)
+                        critique_result = {
+                            "status": "reject",
+                            "fix_patch": "",
+                            "notes": "Execution failed after retries",
+                        }
 
-                if not success:
-                    print(f"    ❌ Failed after {retry_count} retries")
+                    item_artifacts["critic"] = critique_result
+                    self._debug_dump(run_dir, f"critic_{item_id}.json", critique_result)
+                    # One batched transaction per item instead of ~4 file writes
+                    self.history_db.log_artifacts(session_id, item_id, item_artifacts)
+
+                    # Store the final attempt's outcome once per item
+                    exec_summary = {
+                        "item": item,
+                        "code_output": code_output,
+                        "exec_result": exec_result,
+                        "critique_result": critique_result,
+                        "duration_s": round(time.monotonic() - item_started, 3),
+                    }
+                    self.execution_log["exec_results"].append(exec_summary)
+
+                    # Save execution result to history DB
+                    self.history_db.save_execution_result(
+                        session_id=session_id,
+                        item_id=item_id,
+                        code_output=code_output,
+                        exec_result=exec_result,
+                        critique_result=critique_result,
+                        success=success,
+                        retry_count=retry_count,
+                        error=exec_result.get("error")
+                    )
+
+            # Workers are only needed for item execution
+            if pool is not None:
+                pool.close()
 
             # Step 5: Generate final report
             print("\n📝 Step 5: Generating report...")
+            # Convert to plain dicts once at the boundary; reporter, log
+            # files, and callers all share this one materialization
+            highlights = [h.to_dict() for h in highlights]
             # Save highlights for reporter
-            with open(os.path.join(run_dir, "highlights.json"), 'w') as f:
-                json.dump(highlights, f, indent=2)
-
-            final_report = self.reporter.report(highlights, profile)
+            self.history_db.log_artifact(session_id, None, "highlights", highlights)
+            self._debug_dump(run_dir, "highlights.json", highlights)
+
+            if not highlights:
+                # Nothing succeeded: a reporter round-trip would only dress
+                # up an empty result, so emit a stub instead
+                print("⚠️ No successful analyses; skipping reporter call")
+                final_report = {
+                    "markdown": "# EDA Analysis Report\n\nNo analyses completed successfully.",
+                    "next_questions": [],
+                }
+            else:
+                final_report = self.reporter.report(highlights, profile)
             self.execution_log["final_report"] = final_report
             # Save reporter output
-            with open(os.path.join(run_dir, "reporter_output.json"), 'w') as f:
-                json.dump(final_report, f, indent=2)
-            
-            # Save report
+            self.history_db.log_artifact(
+                session_id, None, "reporter_output", final_report
+            )
+            self._debug_dump(run_dir, "reporter_output.json", final_report)
+
+            # Save report (kept as a file: it is the user deliverable).
+            # One buffered write to a temp file, fsync, then an atomic
+            # rename so a crash can never leave a truncated report.md
             report_path = os.path.join(self.report_dir, "report.md")
-            with open(report_path, "w") as f:
+            tmp_path = report_path + ".tmp"
+            with open(tmp_path, "w", buffering=1 << 20) as f:
                 f.write(final_report["markdown"])
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, report_path)
             print(f"✅ Report saved to: {report_path}")
 
             # Save execution log
+            self.execution_log["duration_s"] = round(
+                time.monotonic() - run_started, 3
+            )
             log_path = os.path.join(self.logs_dir, "last_run.json")
-            with open(log_path, "w") as f:
-                json.dump(self.execution_log, f, indent=2)
+            # Written in the background; close() blocks until both finish
+            self._pending_io.append(
+                self._io_pool.submit(self._write_log, log_path, self.execution_log)
+            )
             print(f"✅ Execution log saved to: {log_path}")
             # Also save a copy into the per-run directory
-            with open(os.path.join(run_dir, "execution_log.json"), 'w') as f:
-                json.dump(self.execution_log, f, indent=2)
+            self._pending_io.append(
+                self._io_pool.submit(
+                    self._write_log,
+                    os.path.join(run_dir, "execution_log.json"),
+                    self.execution_log,
+                )
+            )
             
             # Summary
             print(f"\n🎉 EDA Analysis Complete!")
@@ -347,8 +774,12 @@ class EDAOrchestrator:
                 "execution_log": self.execution_log,
             }
             error_path = os.path.join(self.logs_dir, "error_run.json")
-            with open(error_path, "w") as f:
-                json.dump(error_log, f, indent=2)
+            # Synchronous on purpose: the process may be about to exit
+            self._write_log(error_path, error_log)
+
+            # Release any worker processes left running
+            if 'pool' in locals() and pool is not None:
+                pool.close()
 
             # Update session with error details
             if 'session_id' in locals():
@@ -380,6 +811,29 @@ def main():
     parser.add_argument(
         "--api-key", help="DeepSeek API key (or set DEEPSEEK_API_KEY env var)"
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the on-disk LLM response cache for this run",
+    )
+    parser.add_argument(
+        "--debug-dump-json",
+        action="store_true",
+        help="Also write legacy per-run JSON files next to the history DB",
+    )
+    parser.add_argument(
+        "--yes",
+        "--auto-approve",
+        dest="auto_approve",
+        action="store_true",
+        help="Approve the generated plan without prompting",
+    )
+    parser.add_argument(
+        "--approval-timeout",
+        type=float,
+        default=None,
+        help="Seconds to wait at the approval prompt before auto-approving",
+    )
 
     args = parser.parse_args()
 
@@ -388,11 +842,21 @@ def main():
         print(f"❌ CSV file not found: {args.csv_path}")
         sys.exit(1)
 
-    # Initialize orchestrator
-    orchestrator = EDAOrchestrator(api_key=args.api_key)
-
-    # Run EDA
-    result = orchestrator.run_eda(args.csv_path, args.goal, args.max_items)
+    # Initialize orchestrator; the context manager flushes background log
+    # writes on exit
+    with EDAOrchestrator(
+        api_key=args.api_key,
+        use_cache=False if args.no_cache else None,
+        debug_dump_json=args.debug_dump_json,
+    ) as orchestrator:
+        # Run EDA
+        result = orchestrator.run_eda(
+            args.csv_path,
+            args.goal,
+            args.max_items,
+            auto_approve=args.auto_approve,
+            approval_timeout=args.approval_timeout,
+        )
 
     if result["success"]:
         print("\n🎯 Next Questions:")
@@ -0,0 +1,90 @@
+"""
+Persistent worker-process pool for sandboxed code execution
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+# Per-worker state, populated once by _preload when the worker boots.
+# Workers are long-lived, so the heavy imports (pandas, numpy, matplotlib)
+# and the DataFrame load are paid once per worker instead of per item.
+_worker_state: Dict[str, Any] = {}
+
+
+def _preload(df_path: str, artifacts_dir: str, timeout: int) -> None:
+    """Worker initializer: warm imports, build the sandbox, load the frame
+
+    matplotlib import alone costs several hundred milliseconds; doing it in
+    the initializer means every subsequent execute call starts hot. The
+    DataFrame is read once from the Arrow/feather file written by the
+    orchestrator (pickle fallback), not re-serialized per call.
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401 - warm the figure machinery
+    import numpy  # noqa: F401
+    import pandas as pd
+
+    from runtime.executor import SandboxExecutor
+
+    if df_path.endswith(".feather"):
+        df = pd.read_feather(df_path)
+    else:
+        df = pd.read_pickle(df_path)
+
+    _worker_state["df"] = df
+    _worker_state["executor"] = SandboxExecutor(artifacts_dir, timeout=timeout)
+
+
+def _execute(code: str, manifest_schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one code payload against the worker's preloaded frame"""
+    executor = _worker_state["executor"]
+    return executor.execute(code, _worker_state["df"], manifest_schema)
+
+
+class PooledSandboxExecutor:
+    """SandboxExecutor front-end backed by warm worker processes
+
+    Drop-in for the in-process executor's execute() shape, minus the df
+    argument: the frame travels to each worker exactly once at boot via the
+    file written by the orchestrator, so per-item calls ship only the code
+    string. Each worker owns its own matplotlib state, which also makes
+    parallel item execution safe (the in-process executor must stay
+    sequential for that reason).
+    """
+
+    def __init__(
+        self,
+        df_path: str,
+        artifacts_dir: str = "./artifacts",
+        timeout: int = 10,
+        max_workers: Optional[int] = None,
+    ):
+        self.df_path = df_path
+        self.artifacts_dir = artifacts_dir
+        self.timeout = timeout
+        self._pool = ProcessPoolExecutor(
+            max_workers=max_workers or os.cpu_count(),
+            initializer=_preload,
+            initargs=(df_path, artifacts_dir, timeout),
+        )
+
+    def execute(self, code: str, manifest_schema: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute code on a warm worker and return the result dict"""
+        return self._pool.submit(_execute, code, manifest_schema).result()
+
+    def execute_async(self, code: str, manifest_schema: Dict[str, Any]):
+        """Non-blocking variant returning a Future"""
+        return self._pool.submit(_execute, code, manifest_schema)
+
+    def close(self) -> None:
+        """Shut down the worker pool"""
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self) -> "PooledSandboxExecutor":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -3,32 +3,127 @@ Database module for storing conversation and execution history
 """
 
 import sqlite3
-import json
+import queue
 import threading
-from datetime import datetime
+from contextlib import contextmanager
 from typing import Dict, Any, List, Optional
 
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize a payload to JSON text, preferring orjson's native encoder
+
+    OPT_SERIALIZE_NUMPY handles numpy scalars left in exec results without
+    a Python-level default hook. Falls back to stdlib json (with default=str
+    for the odd datetime/ndarray) when orjson is missing or the payload has
+    a type it refuses.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+        except TypeError:
+            pass
+    return json.dumps(obj, default=str)
+
+
 class HistoryDB:
     """SQLite database for storing conversation and execution history"""
 
-    def __init__(self, db_path: str = "./logs/history.db"):
-        """Initialize database connection and create tables if they don't exist"""
+    def __init__(self, db_path: str = "./logs/history.db", pool_size: int = 4):
+        """Initialize the connection pool and create tables if they don't exist"""
         self.db_path = db_path
         self._local = threading.local()
+        # A small bounded pool instead of one connection per thread: each
+        # connection carries its own page cache and file handle, so in a
+        # long-lived multi-threaded process (e.g. the Streamlit UI) the
+        # per-thread scheme grows without bound. WAL allows these
+        # connections to read concurrently while one writes.
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=pool_size)
+        for _ in range(pool_size):
+            self._pool.put(self._new_conn())
         # Create tables on first init
-        with self._get_conn() as conn:
+        with self._conn() as conn:
             self.create_tables(conn)
 
-    def _get_conn(self):
-        """Get a thread-local database connection"""
-        if not hasattr(self._local, 'conn'):
-            self._local.conn = sqlite3.connect(self.db_path)
-        return self._local.conn
+    def _new_conn(self) -> sqlite3.Connection:
+        """Open a pool connection with the PRAGMAs applied once"""
+        # A larger statement cache keeps the hot INSERT texts (plan
+        # versions, execution results, artifacts) parsed and planned
+        # once per connection instead of once per call.
+        # check_same_thread=False is safe here: the pool hands a connection
+        # to exactly one thread at a time.
+        conn = sqlite3.connect(self.db_path, cached_statements=256,
+                               check_same_thread=False)
+        # WAL + NORMAL sync: writers no longer block readers and most
+        # fsyncs disappear; temp_store/mmap keep sorts and page reads
+        # in memory. History data is rebuildable, so the durability
+        # trade-off is acceptable.
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA mmap_size=268435456')
+        conn.execute('PRAGMA cache_size=-65536')
+        # C-implemented row materialization; readers below build dicts
+        # straight from the Row instead of zipping cursor.description
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _conn(self):
+        """Check a connection out of the pool for the duration of one call
+
+        While a session_txn is open on this thread, its pinned connection is
+        reused so every write lands in the same transaction.
+        """
+        pinned = getattr(self._local, 'txn_conn', None)
+        if pinned is not None:
+            yield pinned
+            return
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def session_txn(self):
+        """Group several writes into one BEGIN IMMEDIATE ... COMMIT
+
+        Each save_* call normally commits (and fsyncs) on its own; wrapping
+        a run's hot loop in this context collapses those into a single
+        commit. Rolls back on exception so a failed run leaves no partial
+        rows behind. The connection stays checked out (and pinned to this
+        thread) until the block exits.
+        """
+        conn = self._pool.get()
+        self._local.txn_conn = conn
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        finally:
+            self._local.txn_conn = None
+            self._pool.put(conn)
+
+    def _maybe_commit(self, conn):
+        """Commit now unless a session_txn is batching this write"""
+        if getattr(self._local, 'txn_conn', None) is None:
+            conn.commit()
 
     def create_tables(self, conn):
         """Create necessary tables if they don't exist"""
         cursor = conn.cursor()
-        
+
         # Sessions table for tracking each EDA run
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS sessions (
@@ -76,73 +171,241 @@ class HistoryDB:
         )
         ''')
 
+        # Artifacts table for intermediate pipeline outputs (profile, plan,
+        # per-item code/exec/critic payloads) that used to live as many
+        # small JSON files per run
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS artifacts (
+            artifact_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER,
+            item_id TEXT,
+            kind TEXT,
+            payload TEXT,  -- JSON (or raw text for prompts)
+            ts TEXT,
+            FOREIGN KEY (session_id) REFERENCES sessions(session_id)
+        )
+        ''')
+
+        # The history/detail queries join and filter on session_id and sort
+        # sessions by timestamp; without these the joins degrade to full
+        # table scans as the history grows
+        cursor.execute('DROP INDEX IF EXISTS idx_plan_session')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_plan_session_version
+        ON plan_versions(session_id, version_number)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_exec_session
+        ON execution_results(session_id, success)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_artifacts_session
+        ON artifacts(session_id)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sessions_ts
+        ON sessions(timestamp DESC)
+        ''')
+
         conn.commit()
 
+    @staticmethod
+    def _payload_text(payload: Any) -> str:
+        """Serialize an artifact payload, passing strings through untouched"""
+        if isinstance(payload, str):
+            return payload
+        return _dumps(payload)
+
     def start_session(self, csv_path: str, user_goal: str, max_items: int) -> int:
         """Start a new EDA session and return the session ID"""
-        with self._get_conn() as conn:
+        with self._conn() as conn:
             cursor = conn.cursor()
             cursor.execute('''
             INSERT INTO sessions (timestamp, csv_path, user_goal, max_items)
-            VALUES (?, ?, ?, ?)
-            ''', (datetime.now().isoformat(), csv_path, user_goal, max_items))
-            conn.commit()
+            VALUES (datetime('now'), ?, ?, ?)
+            ''', (csv_path, user_goal, max_items))
+            self._maybe_commit(conn)
             return cursor.lastrowid
 
-    def save_plan_version(self, session_id: int, version_number: int, 
+    def save_plan_version(self, session_id: int, version_number: int,
                          plan_items: List[Dict[str, Any]], user_feedback: Optional[str] = None,
                          approved: bool = False) -> int:
         """Save a plan version for a session"""
-        with self._get_conn() as conn:
+        with self._conn() as conn:
             cursor = conn.cursor()
             cursor.execute('''
             INSERT INTO plan_versions (session_id, version_number, timestamp, plan_items, user_feedback, approved)
-            VALUES (?, ?, ?, ?, ?, ?)
-            ''', (session_id, version_number, datetime.now().isoformat(), 
-                  json.dumps(plan_items), user_feedback, approved))
-            conn.commit()
+            VALUES (?, ?, datetime('now'), ?, ?, ?)
+            ''', (session_id, version_number,
+                  _dumps(plan_items), user_feedback, approved))
+            self._maybe_commit(conn)
             return cursor.lastrowid
 
-    def save_execution_result(self, session_id: int, item_id: str, 
+    def save_execution_result(self, session_id: int, item_id: str,
                             code_output: Dict[str, Any], exec_result: Dict[str, Any],
                             critique_result: Dict[str, Any], success: bool,
                             retry_count: int = 0, error: Optional[str] = None) -> int:
         """Save execution result for an item"""
-        with self._get_conn() as conn:
+        with self._conn() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-            INSERT INTO execution_results 
-            (session_id, item_id, timestamp, code_output, exec_result, critique_result, 
+            INSERT INTO execution_results
+            (session_id, item_id, timestamp, code_output, exec_result, critique_result,
              success, retry_count, error)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (session_id, item_id, datetime.now().isoformat(),
-                  json.dumps(code_output), json.dumps(exec_result),
-                  json.dumps(critique_result), success, retry_count, error))
-            conn.commit()
+            VALUES (?, ?, datetime('now'), ?, ?, ?, ?, ?, ?)
+            ''', (session_id, item_id,
+                  _dumps(code_output), _dumps(exec_result),
+                  _dumps(critique_result), success, retry_count, error))
+            self._maybe_commit(conn)
+            return cursor.lastrowid
+
+    def save_execution_results_bulk(self, session_id: int,
+                                    results: List[Dict[str, Any]]):
+        """Save many execution results in one executemany + one commit
+
+        Each dict takes the same fields as save_execution_result. Payloads
+        are serialized up front in a comprehension so sqlite3's C loop does
+        not re-enter Python per row, and the single commit amortizes the
+        WAL fsync over the whole batch.
+        """
+        rows = [
+            (session_id, r['item_id'],
+             _dumps(r['code_output']), _dumps(r['exec_result']),
+             _dumps(r['critique_result']), r['success'],
+             r.get('retry_count', 0), r.get('error'))
+            for r in results
+        ]
+        with self._conn() as conn:
+            conn.executemany('''
+            INSERT INTO execution_results
+            (session_id, item_id, timestamp, code_output, exec_result, critique_result,
+             success, retry_count, error)
+            VALUES (?, ?, datetime('now'), ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self._maybe_commit(conn)
+
+    def bulk_record_session(self, session_id: int,
+                            plans: List[Dict[str, Any]],
+                            executions: List[Dict[str, Any]]):
+        """Record a session's plans and execution results in one transaction
+
+        Serializes every payload up front, then runs two executemany calls
+        under a single BEGIN IMMEDIATE/COMMIT — one WAL fsync for the whole
+        session instead of one per row. Plan dicts take the
+        save_plan_version fields, execution dicts the
+        save_execution_result fields. Inside an open session_txn the outer
+        transaction is reused.
+        """
+        plan_rows = [
+            (session_id, p['version_number'], _dumps(p['plan_items']),
+             p.get('user_feedback'), p.get('approved', False))
+            for p in plans
+        ]
+        exec_rows = [
+            (session_id, r['item_id'],
+             _dumps(r['code_output']), _dumps(r['exec_result']),
+             _dumps(r['critique_result']), r['success'],
+             r.get('retry_count', 0), r.get('error'))
+            for r in executions
+        ]
+        with self._conn() as conn:
+            in_txn = getattr(self._local, 'txn_conn', None) is not None
+            if not in_txn:
+                conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany('''
+                INSERT INTO plan_versions (session_id, version_number, timestamp, plan_items, user_feedback, approved)
+                VALUES (?, ?, datetime('now'), ?, ?, ?)
+                ''', plan_rows)
+                conn.executemany('''
+                INSERT INTO execution_results
+                (session_id, item_id, timestamp, code_output, exec_result, critique_result,
+                 success, retry_count, error)
+                VALUES (?, ?, datetime('now'), ?, ?, ?, ?, ?, ?)
+                ''', exec_rows)
+                if not in_txn:
+                    conn.commit()
+            except Exception:
+                if not in_txn:
+                    conn.rollback()
+                raise
+
+    def log_artifact(self, session_id: int, item_id: Optional[str], kind: str,
+                     payload: Any) -> int:
+        """Store one pipeline artifact (e.g. profile, plan, code output)"""
+        with self._conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            INSERT INTO artifacts (session_id, item_id, kind, payload, ts)
+            VALUES (?, ?, ?, ?, datetime('now'))
+            ''', (session_id, item_id, kind, self._payload_text(payload)))
+            self._maybe_commit(conn)
             return cursor.lastrowid
 
+    def log_artifacts(self, session_id: int, item_id: Optional[str],
+                      artifacts: Dict[str, Any]):
+        """Store several artifacts for one item in a single transaction
+
+        One BEGIN/COMMIT per item replaces the old pattern of ~5 small JSON
+        file writes (each with its own open+fsync) in the execution hot loop.
+        """
+        rows = [
+            (session_id, item_id, kind, self._payload_text(payload))
+            for kind, payload in artifacts.items()
+        ]
+        with self._conn() as conn:
+            conn.executemany('''
+            INSERT INTO artifacts (session_id, item_id, kind, payload, ts)
+            VALUES (?, ?, ?, ?, datetime('now'))
+            ''', rows)
+            self._maybe_commit(conn)
+
     def complete_session(self, session_id: int, success: bool, profile: Dict[str, Any],
                         report_path: Optional[str] = None, artifacts_dir: Optional[str] = None,
                         error: Optional[str] = None):
         """Update session with completion details"""
-        with self._get_conn() as conn:
+        with self._conn() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-            UPDATE sessions 
+            UPDATE sessions
             SET success = ?, profile = ?, report_path = ?, artifacts_dir = ?, error = ?
             WHERE session_id = ?
-            ''', (success, json.dumps(profile), report_path, artifacts_dir, error, session_id))
-            conn.commit()
+            ''', (success, _dumps(profile), report_path, artifacts_dir, error, session_id))
+            self._maybe_commit(conn)
 
     def get_session_history(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent session history with their plans and results"""
-        with self._get_conn() as conn:
+        with self._conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT s.*,
+                   COUNT(DISTINCT p.version_id) as plan_versions,
+                   COUNT(DISTINCT e.result_id) as executions,
+                   COUNT(DISTINCT CASE WHEN e.success = 1 THEN e.result_id END) as successful_executions
+            FROM sessions s
+            LEFT JOIN plan_versions p ON s.session_id = p.session_id
+            LEFT JOIN execution_results e ON s.session_id = e.session_id
+            GROUP BY s.session_id
+            ORDER BY s.timestamp DESC
+            LIMIT ?
+            ''', (limit,))
+
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_sessions_with_stats(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Recent sessions with aggregate counts, skipping bulky columns
+
+        Same single GROUP BY join as get_session_history, but projects only
+        the listing fields — the profile JSON and error blobs stay in SQLite
+        instead of crossing the bridge for every row.
+        """
+        with self._conn() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-            SELECT s.*, 
+            SELECT s.session_id, s.timestamp, s.csv_path, s.user_goal, s.success,
                    COUNT(DISTINCT p.version_id) as plan_versions,
                    COUNT(DISTINCT e.result_id) as executions,
-                   SUM(CASE WHEN e.success = 1 THEN 1 ELSE 0 END) as successful_executions
+                   COUNT(DISTINCT CASE WHEN e.success = 1 THEN e.result_id END) as successful_executions
             FROM sessions s
             LEFT JOIN plan_versions p ON s.session_id = p.session_id
             LEFT JOIN execution_results e ON s.session_id = e.session_id
@@ -150,86 +413,93 @@ class HistoryDB:
             ORDER BY s.timestamp DESC
             LIMIT ?
             ''', (limit,))
-            
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+            return [dict(row) for row in cursor.fetchall()]
 
     def get_session_details(self, session_id: int) -> Dict[str, Any]:
         """Get detailed information about a specific session"""
-        with self._get_conn() as conn:
+        with self._conn() as conn:
             cursor = conn.cursor()
-            
+
             # Get session info
             cursor.execute('SELECT * FROM sessions WHERE session_id = ?', (session_id,))
-            session = dict(zip([col[0] for col in cursor.description], cursor.fetchone()))
-            
+            session = dict(cursor.fetchone())
+
             # Get plan versions
             cursor.execute('SELECT * FROM plan_versions WHERE session_id = ? ORDER BY version_number', (session_id,))
-            plan_columns = [col[0] for col in cursor.description]
-            session['plan_versions'] = [dict(zip(plan_columns, row)) for row in cursor.fetchall()]
-            
+            session['plan_versions'] = [dict(row) for row in cursor.fetchall()]
+
             # Get execution results
             cursor.execute('SELECT * FROM execution_results WHERE session_id = ? ORDER BY timestamp', (session_id,))
-            exec_columns = [col[0] for col in cursor.description]
-            session['execution_results'] = [dict(zip(exec_columns, row)) for row in cursor.fetchall()]
-            
+            session['execution_results'] = [dict(row) for row in cursor.fetchall()]
+
             return session
 
     def delete_session(self, session_id: int):
         """Delete a session and all its related data"""
-        with self._get_conn() as conn:
+        with self._conn() as conn:
             cursor = conn.cursor()
-            
+
             # Delete execution results first (foreign key constraint)
             cursor.execute('DELETE FROM execution_results WHERE session_id = ?', (session_id,))
-            
+
             # Delete plan versions (foreign key constraint)
             cursor.execute('DELETE FROM plan_versions WHERE session_id = ?', (session_id,))
-            
+
+            # Delete stored artifacts
+            cursor.execute('DELETE FROM artifacts WHERE session_id = ?', (session_id,))
+
             # Finally delete the session
             cursor.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
-            
+
             conn.commit()
 
     def delete_all_sessions(self):
         """Delete all sessions and related data"""
-        with self._get_conn() as conn:
+        with self._conn() as conn:
             cursor = conn.cursor()
-            
+
             # Delete all execution results
             cursor.execute('DELETE FROM execution_results')
-            
-            # Delete all plan versions  
+
+            # Delete all plan versions
             cursor.execute('DELETE FROM plan_versions')
-            
+
+            # Delete all stored artifacts
+            cursor.execute('DELETE FROM artifacts')
+
             # Delete all sessions
             cursor.execute('DELETE FROM sessions')
-            
+
             conn.commit()
 
     def delete_sessions_by_date(self, target_date: str):
         """Delete all sessions from a specific date (YYYY-MM-DD format)"""
-        with self._get_conn() as conn:
+        with self._conn() as conn:
             cursor = conn.cursor()
-            
+
             # Get session IDs for the target date
             cursor.execute('''
-            SELECT session_id FROM sessions 
+            SELECT session_id FROM sessions
             WHERE DATE(timestamp) = ?
             ''', (target_date,))
-            
+
             session_ids = [row[0] for row in cursor.fetchall()]
-            
+
             # Delete related data for each session
             for session_id in session_ids:
                 cursor.execute('DELETE FROM execution_results WHERE session_id = ?', (session_id,))
                 cursor.execute('DELETE FROM plan_versions WHERE session_id = ?', (session_id,))
+                cursor.execute('DELETE FROM artifacts WHERE session_id = ?', (session_id,))
                 cursor.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
-            
+
             conn.commit()
 
     def close(self):
-        """Close the database connection"""
-        if hasattr(self._local, 'conn'):
-            self._local.conn.close()
-            del self._local.conn
+        """Close all pooled connections"""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
@@ -0,0 +1,100 @@
+"""
+SQLite-backed LLM response cache
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Opt-in via environment so demos/batch reruns can reuse responses without
+# changing call sites; unset or "0" disables caching entirely
+CACHE_ENV_VAR = "DEEPSEEK_CACHE_ENABLED"
+
+# Default time-to-live for cached responses, in seconds
+DEFAULT_TTL = 3600
+
+
+def cache_enabled() -> bool:
+    """Whether response caching is switched on via the environment"""
+    return os.getenv(CACHE_ENV_VAR, "0").lower() in ("1", "true", "yes")
+
+
+class SQLiteLLMCache:
+    """
+    Persistent response cache keyed by a hash of (prompt, llm_string)
+
+    Repeated run_eda invocations (demo retries, goal sweeps) issue the same
+    planner/coder/critic payloads; a hit returns the stored JSON response in
+    microseconds instead of a 1-3 s network round-trip. A single SQLite file
+    replaces many small cache files: one fsync per write and O(log n)
+    indexed lookups. The connection is shared across the client's worker
+    threads behind a lock.
+    """
+
+    def __init__(self, db_path: str = "./logs/llm_cache.db", ttl: int = DEFAULT_TTL):
+        self.db_path = db_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        # WAL keeps readers unblocked during writes; NORMAL sync is safe
+        # with WAL and skips most fsyncs for this throwaway-able cache
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256((prompt + llm_string).encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for (prompt, llm_string), or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?",
+                (self._key(prompt, llm_string),),
+            ).fetchone()
+        if row is None:
+            return None
+        response_json, created_at = row
+        if self.ttl and time.time() - created_at > self.ttl:
+            return None
+        try:
+            return json.loads(response_json)
+        except Exception:
+            return None
+
+    def update(self, prompt: str, llm_string: str, response: Dict[str, Any]) -> None:
+        """Store a response; persistence is best-effort"""
+        try:
+            payload = json.dumps(response, separators=(",", ":"), default=str)
+        except Exception:
+            return
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, response, created_at)"
+                    " VALUES (?, ?, ?)",
+                    (self._key(prompt, llm_string), payload, time.time()),
+                )
+                self._conn.commit()
+            except sqlite3.Error:
+                pass
+
+    def close(self) -> None:
+        """Close the underlying connection"""
+        with self._lock:
+            self._conn.close()
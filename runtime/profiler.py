@@ -5,9 +5,15 @@ Deterministic CSV profiler that generates profile JSON
 import pandas as pd
 import numpy as np
 import json
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Union
 import os
 
+try:
+    import pyarrow.csv as pacsv
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pacsv = None
+
 
 class CSVProfiler:
     """Deterministic CSV profiler that analyzes data and generates structured profile"""
@@ -15,30 +21,44 @@ class CSVProfiler:
     def __init__(self, sample_size: int = 10000):
         self.sample_size = sample_size
 
-    def profile(self, csv_path: str) -> Dict[str, Any]:
+    def profile(self, data: Union[str, pd.DataFrame]) -> Dict[str, Any]:
         """
-        Profile a CSV file and return structured profile JSON
+        Profile a CSV file or an already-loaded DataFrame
+
+        Accepting a DataFrame lets callers that load the file anyway (the
+        orchestrator reads it for execution) share one read instead of
+        parsing the same CSV twice.
 
         Args:
-            csv_path: Path to the CSV file
+            data: Path to the CSV file, or a DataFrame to profile directly
 
         Returns:
             Profile dictionary matching the schema
         """
-        if not os.path.exists(csv_path):
-            raise FileNotFoundError(f"CSV file not found: {csv_path}")
+        if isinstance(data, pd.DataFrame):
+            df = data
+        else:
+            if not os.path.exists(data):
+                raise FileNotFoundError(f"CSV file not found: {data}")
 
-        # Load data with sampling for large files
-        df = self._load_data(csv_path)
+            # Load data with sampling for large files
+            df = self._load_data(data)
 
         # Calculate memory estimate
         memory_estimate = df.memory_usage(deep=True).sum() / 1024 / 1024  # MB
 
-        # Profile each column
-        columns = []
-        for col in df.columns:
-            col_profile = self._profile_column(df, col)
-            columns.append(col_profile)
+        # Profile each column. Profiles are independent and the heavy
+        # reductions run in numpy/pandas C code that releases the GIL, so
+        # a thread pool scales with cores on wide frames; narrow frames
+        # skip the executor overhead.
+        if len(df.columns) > 4:
+            workers = min(8, os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                columns = list(
+                    pool.map(lambda col: self._profile_column(df, col), df.columns)
+                )
+        else:
+            columns = [self._profile_column(df, col) for col in df.columns]
 
         # Detect suspected target column
         suspected_target = self._detect_target_column(df, columns)
@@ -56,30 +76,69 @@ class CSVProfiler:
     def _load_data(self, csv_path: str) -> pd.DataFrame:
         """Load CSV data with sampling for large files"""
         try:
-            # First, try to read a small sample to check structure
-            sample_df = pd.read_csv(csv_path, nrows=1000)
+            # First, try to read a small sample to check structure (pyarrow
+            # does its own schema inference, so skip the probe there)
+            if pacsv is None:
+                pd.read_csv(csv_path, nrows=1000)
 
             # If file is small enough, load all
             file_size = os.path.getsize(csv_path)
             if file_size < 50 * 1024 * 1024:  # 50MB
-                return pd.read_csv(csv_path)
+                return self._read_full(csv_path)
 
             # For large files, sample
-            total_rows = sum(1 for _ in open(csv_path)) - 1  # Subtract header
+            total_rows = self._count_lines(csv_path) - 1  # Subtract header
             if total_rows <= self.sample_size:
-                return pd.read_csv(csv_path)
-
-            # Sample rows
-            skip_rows = np.random.choice(
-                range(1, total_rows + 1),
-                size=total_rows - self.sample_size,
-                replace=False,
+                return self._read_full(csv_path)
+
+            # Sample rows: draw the indices to KEEP and skip the rest via a
+            # callable. Materializing the inverse (an int64 array with one
+            # entry per skipped row) cost ~8 bytes per file row just to tell
+            # pandas which lines to drop; the kept set is sample_size entries
+            kept = set(
+                np.random.choice(total_rows, size=self.sample_size, replace=False) + 1
+            )
+            return pd.read_csv(
+                csv_path, skiprows=lambda i: i > 0 and i not in kept
             )
-            return pd.read_csv(csv_path, skiprows=skip_rows)
 
         except Exception as e:
             raise Exception(f"Failed to load CSV: {e}")
 
+    @staticmethod
+    def _read_full(csv_path: str) -> pd.DataFrame:
+        """
+        Read the whole CSV, preferring pyarrow's multi-threaded parser
+
+        The sampling path still goes through pandas because pyarrow has no
+        skiprows equivalent.
+        """
+        if pacsv is not None:
+            try:
+                # strings_can_be_null matches pandas: empty fields become
+                # NaN rather than "", so missing counts stay truthful
+                return pacsv.read_csv(
+                    csv_path,
+                    convert_options=pacsv.ConvertOptions(strings_can_be_null=True),
+                ).to_pandas()
+            except Exception:
+                pass
+        return pd.read_csv(csv_path)
+
+    @staticmethod
+    def _count_lines(csv_path: str) -> int:
+        """
+        Count newlines by scanning fixed-size binary chunks
+
+        bytes.count dispatches to C memchr, so this runs at disk/memory
+        speed instead of iterating the file line by line in Python.
+        """
+        count = 0
+        with open(csv_path, "rb", buffering=1 << 20) as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                count += chunk.count(b"\n")
+        return count
+
     def _profile_column(self, df: pd.DataFrame, col: str) -> Dict[str, Any]:
         """Profile a single column"""
         series = df[col]
@@ -115,9 +174,12 @@ class CSVProfiler:
 
     def _get_numeric_stats(self, series: pd.Series) -> Dict[str, Any]:
         """Get numeric statistics for a series"""
-        clean_series = series.dropna()
+        # Work on the raw ndarray: one NaN mask plus one fused percentile
+        # call replaces five pandas passes (dropna/min/max/mean/quantile)
+        arr = series.to_numpy(dtype=np.float64)
+        arr = arr[~np.isnan(arr)]
 
-        if clean_series.empty:
+        if arr.size == 0:
             return {
                 "min": 0.0,
                 "max": 0.0,
@@ -132,19 +194,19 @@ class CSVProfiler:
                 },
             }
 
-        quantiles = clean_series.quantile([0.0, 0.25, 0.5, 0.75, 1.0])
+        quantiles = np.percentile(arr, [0, 25, 50, 75, 100])
 
         return {
-            "min": float(clean_series.min()),
-            "max": float(clean_series.max()),
-            "mean": float(clean_series.mean()),
-            "std": float(clean_series.std()),
+            "min": float(quantiles[0]),
+            "max": float(quantiles[4]),
+            "mean": float(arr.mean()),
+            "std": float(arr.std(ddof=1)),
             "quantiles": {
-                "0.0": float(quantiles[0.0]),
-                "0.25": float(quantiles[0.25]),
-                "0.5": float(quantiles[0.5]),
-                "0.75": float(quantiles[0.75]),
-                "1.0": float(quantiles[1.0]),
+                "0.0": float(quantiles[0]),
+                "0.25": float(quantiles[1]),
+                "0.5": float(quantiles[2]),
+                "0.75": float(quantiles[3]),
+                "1.0": float(quantiles[4]),
             },
         }
 
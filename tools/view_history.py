@@ -8,17 +8,26 @@ import json
 import argparse
 from tabulate import tabulate
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is optional
+    _loads = json.loads
+
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from runtime.history_db import HistoryDB
 
 def format_timestamp(ts):
     """Format timestamp for display"""
-    return ts.split("T")[0] + " " + ts.split("T")[1][:8]
+    # Rows written by older versions use isoformat ("T" separator); newer
+    # rows are stamped by SQLite with a space separator
+    date_part, _, time_part = ts.replace("T", " ").partition(" ")
+    return date_part + " " + time_part[:8]
 
 def show_sessions(db: HistoryDB, limit: int = 10):
     """Show recent sessions"""
-    sessions = db.get_session_history(limit)
+    sessions = db.get_sessions_with_stats(limit)
     
     # Format for display
     rows = []
@@ -58,7 +67,7 @@ def show_session_details(db: HistoryDB, session_id: int):
               (" (Approved)" if plan['approved'] else ""))
         if plan['user_feedback']:
             print(f"Feedback: {plan['user_feedback']}")
-        items = json.loads(plan['plan_items'])
+        items = _loads(plan['plan_items'])
         for item in items:
             print(f"- {item.get('id')}: {item.get('goal')} " +
                   f"({', '.join(item.get('plots', []))})")
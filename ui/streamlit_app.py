@@ -1,9 +1,13 @@
 import os
+import hashlib
 import io
 import json
+import shutil
 import sys
+import numpy as np
 import pandas as pd
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Ensure project root is on path so we can import main.py
@@ -14,6 +18,43 @@ if PROJECT_ROOT not in sys.path:
 
 from main import EDAOrchestrator
 from runtime.history_db import HistoryDB
+from runtime.profiler import CSVProfiler
+
+# Streamlit reruns this script on every widget interaction; keying these on
+# a content hash means the CSV is only re-profiled/re-parsed when the upload
+# actually changes, not on every click
+@st.cache_data(show_spinner=False, max_entries=4)
+def _profile_cached(csv_path, content_hash):
+    return CSVProfiler().profile(csv_path)
+
+# Memoize the initial planner call on its actual inputs; regenerations with
+# user feedback bypass this so they always reach the LLM. Underscore args
+# are excluded from the cache key per st.cache_data convention.
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=8)
+def _plan_cached(profile_key, goal, max_items, samples_key, _planner, _profile, _samples):
+    return _planner.plan(_profile, goal, max_items, data_samples=_samples)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _load_df_cached(csv_path, content_hash):
+    # pyarrow's threaded parser when available; numpy-backed columns are
+    # kept (no dtype_backend) so generated plotting code sees plain dtypes
+    try:
+        return pd.read_csv(csv_path, engine="pyarrow")
+    except Exception:
+        return pd.read_csv(csv_path)
+
+# Charts are re-rendered on every rerun; caching the PNG bytes keyed on
+# (path, mtime) skips re-reading unchanged files from disk, while a new
+# mtime (e.g. a retry overwrote the chart) invalidates the entry
+@st.cache_data(show_spinner=False, max_entries=128)
+def _img_bytes(path, mtime):
+    with open(path, "rb") as f:
+        return f.read()
+
+# st.fragment landed in 1.37 (shipped as experimental_fragment in
+# 1.33-1.36); on older versions fall back to a no-op decorator so the
+# wrapped block simply reruns with the rest of the script
+_fragment = getattr(st, "fragment", getattr(st, "experimental_fragment", lambda f: f))
 
 # Initialize history database
 @st.cache_resource
@@ -830,7 +871,7 @@ if st.session_state.viewing_session:
                             for idx, chart in enumerate(charts):
                                 if os.path.exists(chart['saved_path']):
                                     with plot_cols[idx % 2]:
-                                        st.image(chart['saved_path'], use_container_width=True, caption=f"Chart {idx + 1}")
+                                        st.image(_img_bytes(chart['saved_path'], os.path.getmtime(chart['saved_path'])), use_container_width=True, caption=f"Chart {idx + 1}")
                         else:
                             st.info("📝 No visualizations found for this item.")
                     except Exception as e:
@@ -862,7 +903,11 @@ elif uploaded_file is not None:
     try:
         # Read uploaded CSV into a temp path so orchestrator can read it again
         csv_bytes = uploaded_file.getvalue()
-        df_preview = pd.read_csv(io.BytesIO(csv_bytes))
+        content_hash = hashlib.blake2b(csv_bytes, digest_size=16).hexdigest()
+        # Only materialize the 50 preview rows; the full parse happens once
+        # in the cached loader when the analysis actually runs
+        df_preview = pd.read_csv(io.BytesIO(csv_bytes), nrows=50)
+        total_rows = max(csv_bytes.count(b"\n") - 1, len(df_preview))
         
         # Data preview section with improved styling
         st.markdown("## 👀 Data Preview")
@@ -870,32 +915,40 @@ elif uploaded_file is not None:
         # Data info cards
         preview_col1, preview_col2, preview_col3, preview_col4 = st.columns(4)
         with preview_col1:
-            st.metric("📊 Rows", f"{len(df_preview):,}")
+            st.metric("📊 Rows", f"{total_rows:,}")
         with preview_col2:
             st.metric("📋 Columns", len(df_preview.columns))
         with preview_col3:
-            st.metric("💾 Size", f"{df_preview.memory_usage(deep=True).sum() / 1024:.1f} KB")
+            st.metric("💾 Size", f"{len(csv_bytes) / 1024:.1f} KB")
         with preview_col4:
             numeric_cols = len(df_preview.select_dtypes(include=['number']).columns)
             st.metric("🔢 Numeric", numeric_cols)
         
         # Show preview table
-        st.dataframe(df_preview.head(50), use_container_width=True)
+        st.dataframe(df_preview, use_container_width=True)
 
-        # Save to a temp file path
+        # Save to a temp file path. Stream the upload in 1MB chunks and
+        # publish it with an atomic rename so a rerun mid-write never leaves
+        # a truncated CSV at the path the orchestrator reads from
         tmp_dir = os.path.join("./logs", "ui_uploads")
         os.makedirs(tmp_dir, exist_ok=True)
         tmp_csv_path = os.path.join(tmp_dir, uploaded_file.name)
-        with open(tmp_csv_path, "wb") as f:
-            f.write(csv_bytes)
+        uploaded_file.seek(0)
+        with open(tmp_csv_path + ".part", "wb") as f:
+            shutil.copyfileobj(uploaded_file, f, length=1 << 20)
+        os.replace(tmp_csv_path + ".part", tmp_csv_path)
 
-        # Initialize orchestrator once per session
-        if "orchestrator" not in st.session_state:
-            st.session_state["orchestrator"] = EDAOrchestrator(api_key=api_key or None)
-        else:
-            # If API key changes, re-init orchestrator
-            if api_key and api_key != os.getenv("DEEPSEEK_API_KEY", ""):
-                st.session_state["orchestrator"] = EDAOrchestrator(api_key=api_key)
+        # Initialize orchestrator once per session, rebuilt only when the
+        # API key actually changes. The old check re-created it (HTTP
+        # session pool included) on every rerun whenever a manual key was
+        # entered.
+        orch_key = api_key or ""
+        if st.session_state.get("orchestrator_key") != orch_key:
+            previous = st.session_state.get("orchestrator")
+            if previous is not None:
+                previous.close()
+            st.session_state["orchestrator"] = EDAOrchestrator(api_key=orch_key or None)
+            st.session_state["orchestrator_key"] = orch_key
 
         # Mark analysis as started on click and reset caches for a fresh run
         if run_button:
@@ -933,14 +986,19 @@ elif uploaded_file is not None:
                     st.markdown("### 1️⃣ Profile")
                     if "profile" not in st.session_state:
                         with st.spinner("Profiling data..."):
-                            profile = orchestrator.profiler.profile(st.session_state.get("tmp_csv_path", tmp_csv_path))
-                        st.session_state["profile"] = profile
+                            st.session_state["profile"] = _profile_cached(
+                                st.session_state.get("tmp_csv_path", tmp_csv_path),
+                                content_hash,
+                            )
                     profile = st.session_state["profile"]
                     st.success(f"✅ {profile.get('rows_total', 0):,} rows\n{len(profile.get('columns', []))} columns")
 
                 # Load data silently (no UI indicator)
                 if "df" not in st.session_state:
-                    st.session_state["df"] = pd.read_csv(st.session_state.get("tmp_csv_path", tmp_csv_path))
+                    st.session_state["df"] = _load_df_cached(
+                        st.session_state.get("tmp_csv_path", tmp_csv_path),
+                        content_hash,
+                    )
                 df = st.session_state["df"]
 
                 # Step 2: Plan indicator
@@ -973,136 +1031,173 @@ elif uploaded_file is not None:
             if "plan_versions" not in st.session_state:
                 with st.spinner("🤖 Generating analysis plan..."):
                     try:
-                        sample_rows = df.sample(n=min(8, len(df)), random_state=42).to_dict(orient='records')
+                        # df.sample permutes the full index just to hand 8
+                        # rows to the planner; drawing positions directly is
+                        # O(n) instead of O(rows)
+                        n_rows = min(8, len(df))
+                        positions = np.random.default_rng(42).integers(
+                            0, len(df), size=n_rows
+                        )
+                        sample_rows = df.iloc[positions].to_dict(orient='records')
                     except Exception:
                         sample_rows = []
                     st.session_state["sample_rows"] = sample_rows
-                    plan_resp = orchestrator.planner.plan(profile, st.session_state.get("goal", goal), st.session_state.get("max_items", max_items), data_samples=sample_rows)
+                    profile_key = hashlib.blake2b(
+                        json.dumps(profile, sort_keys=True, default=str).encode(),
+                        digest_size=16,
+                    ).hexdigest()
+                    samples_key = hashlib.blake2b(
+                        json.dumps(sample_rows, default=str).encode(),
+                        digest_size=16,
+                    ).hexdigest()
+                    plan_resp = _plan_cached(
+                        profile_key,
+                        st.session_state.get("goal", goal),
+                        st.session_state.get("max_items", max_items),
+                        samples_key,
+                        orchestrator.planner,
+                        profile,
+                        sample_rows,
+                    )
                     st.session_state["plan_versions"] = [
                         {"label": "Original", "items": plan_resp.get("eda_plan", [])}
                     ]
 
-            plan_versions = st.session_state.get("plan_versions", [])
-            
-            # Render all versions with improved styling
-            approved_index = st.session_state.get("approved_plan_index", None)
-            
-            # Show approved plan status if one exists
-            if approved_index is not None:
-                st.success(f"✅ Plan {approved_index + 1} has been approved and will be executed below.")
-            
-            for idx, version in enumerate(plan_versions):
-                # Show if this plan is approved
-                if approved_index == idx:
-                    st.markdown(f"### {idx+1}. {version.get('label','Version')} Plan ✅ **APPROVED**")
-                else:
-                    st.markdown(f"### {idx+1}. {version.get('label','Version')} Plan")
-                
-                items = version.get("items", [])
-                if items:
-                    # Create a grid layout for plan items
-                    for i in range(0, len(items), 2):
-                        item_cols = st.columns(2)
-                        for j, col in enumerate(item_cols):
-                            if i + j < len(items):
-                                item = items[i + j]
-                                with col:
-                                    item_id = item.get("id", "unknown")
-                                    goal_txt = item.get("goal", "")
-                                    priority = str(item.get("priority", "")).strip()
-                                    plots = ", ".join(item.get("plots", []))
-                                    columns = ", ".join(item.get("columns", []))
-                                    notes = item.get("notes", "")
-
-                                    # Priority color coding
-                                    priority_colors = {
-                                        "high": "#ef4444",
-                                        "medium": "#f59e0b", 
-                                        "low": "#10b981"
-                                    }
-                                    priority_color = priority_colors.get(priority.lower(), "#6b7280")
-
-                                    st.markdown(f"""
-                                    <div style='background: #f8fafc; border-radius: 8px; padding: 1rem; margin: 0.5rem 0; border-left: 4px solid {priority_color};'>
-                                        <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 0.5rem;'>
-                                            <h4 style='margin: 0; color: #1e293b;'>📊 Item {item_id}</h4>
-                                            <span style='background: {priority_color}; color: white; padding: 0.2rem 0.5rem; border-radius: 4px; font-size: 0.8rem; font-weight: 600;'>{priority.upper() if priority else "NORMAL"}</span>
+            # Plan review runs as a fragment: approving a plan or asking
+            # for an updated version reruns only this block instead of
+            # replaying Steps 1-3 above on every click
+            @_fragment
+            def _render_plan_review():
+                plan_versions = st.session_state.get("plan_versions", [])
+
+                # Render all versions with improved styling
+                approved_index = st.session_state.get("approved_plan_index", None)
+
+                # Show approved plan status if one exists
+                if approved_index is not None:
+                    st.success(f"✅ Plan {approved_index + 1} has been approved and will be executed below.")
+
+                for idx, version in enumerate(plan_versions):
+                    # Show if this plan is approved
+                    if approved_index == idx:
+                        st.markdown(f"### {idx+1}. {version.get('label','Version')} Plan ✅ **APPROVED**")
+                    else:
+                        st.markdown(f"### {idx+1}. {version.get('label','Version')} Plan")
+
+                    items = version.get("items", [])
+                    if items:
+                        # Create a grid layout for plan items
+                        for i in range(0, len(items), 2):
+                            item_cols = st.columns(2)
+                            for j, col in enumerate(item_cols):
+                                if i + j < len(items):
+                                    item = items[i + j]
+                                    with col:
+                                        item_id = item.get("id", "unknown")
+                                        goal_txt = item.get("goal", "")
+                                        priority = str(item.get("priority", "")).strip()
+                                        plots = ", ".join(item.get("plots", []))
+                                        columns = ", ".join(item.get("columns", []))
+                                        notes = item.get("notes", "")
+
+                                        # Priority color coding
+                                        priority_colors = {
+                                            "high": "#ef4444",
+                                            "medium": "#f59e0b",
+                                            "low": "#10b981"
+                                        }
+                                        priority_color = priority_colors.get(priority.lower(), "#6b7280")
+
+                                        st.markdown(f"""
+                                        <div style='background: #f8fafc; border-radius: 8px; padding: 1rem; margin: 0.5rem 0; border-left: 4px solid {priority_color};'>
+                                            <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 0.5rem;'>
+                                                <h4 style='margin: 0; color: #1e293b;'>📊 Item {item_id}</h4>
+                                                <span style='background: {priority_color}; color: white; padding: 0.2rem 0.5rem; border-radius: 4px; font-size: 0.8rem; font-weight: 600;'>{priority.upper() if priority else "NORMAL"}</span>
+                                            </div>
+                                            <p style='margin: 0.5rem 0; color: #475569; font-size: 0.9rem;'><strong>Goal:</strong> {goal_txt}</p>
+                                            <p style='margin: 0.5rem 0; color: #475569; font-size: 0.9rem;'><strong>Plots:</strong> {plots}</p>
+                                            <p style='margin: 0.5rem 0; color: #475569; font-size: 0.9rem;'><strong>Columns:</strong> {columns}</p>
+                                            {f"<p style='margin: 0.5rem 0; color: #475569; font-size: 0.9rem;'><strong>Notes:</strong> {notes}</p>" if notes else ""}
                                         </div>
-                                        <p style='margin: 0.5rem 0; color: #475569; font-size: 0.9rem;'><strong>Goal:</strong> {goal_txt}</p>
-                                        <p style='margin: 0.5rem 0; color: #475569; font-size: 0.9rem;'><strong>Plots:</strong> {plots}</p>
-                                        <p style='margin: 0.5rem 0; color: #475569; font-size: 0.9rem;'><strong>Columns:</strong> {columns}</p>
-                                        {f"<p style='margin: 0.5rem 0; color: #475569; font-size: 0.9rem;'><strong>Notes:</strong> {notes}</p>" if notes else ""}
-                                    </div>
-                                    """, unsafe_allow_html=True)
-                else:
-                    st.info("📝 Plan is empty.")
-                
-                # Approval button with better styling - centered
-                # Only show approval buttons if no plan has been approved yet
-                if approved_index is None:
-                    approval_col1, approval_col2, approval_col3 = st.columns([1, 2, 1])
-                    with approval_col2:
-                        # Use a simple key without session ID to avoid key conflicts
-                        if st.button(f"✅ Approve Plan {idx+1}", key=f"approve_plan_{idx}", use_container_width=True):
-                            # Save approved plan to database
-                            if "session_id" in st.session_state:
-                                history_db.save_plan_version(
-                                    st.session_state["session_id"],
-                                    version_number=idx+1,
-                                    plan_items=items,
-                                    approved=True
-                                )
-                            # Store the approved index in session state for persistence
-                            st.session_state["approved_plan_index"] = idx
-                            # Clear the button interaction by adding a completion flag
-                            st.session_state["plan_approved_flag"] = True
-                            # Rerun to update UI and remove buttons completely
-                            st.rerun()
-                
-                st.markdown("---")
+                                        """, unsafe_allow_html=True)
+                    else:
+                        st.info("📝 Plan is empty.")
 
-            # Request changes form (only show if no plan approved)
-            if approved_index is None:
-                with st.expander("🔄 Request Changes (Generate New Version)", expanded=False):
-                    st.markdown("Describe what you'd like to adjust in the analysis plan:")
-                    feedback = st.text_area("Your feedback", 
-                                           placeholder="E.g., 'Focus more on correlation analysis', 'Add time series plots', 'Remove redundant visualizations'...",
-                                           key="feedback_text",
-                                           height=100)
-                    
-                    feedback_col1, feedback_col2, feedback_col3 = st.columns([1, 2, 1])
-                    with feedback_col2:
-                        if st.button("🔄 Generate Updated Plan", key="request_changes", use_container_width=True):
-                            with st.spinner("🤖 Generating updated plan..."):
-                                plan_resp = orchestrator.planner.plan(
-                                    st.session_state["profile"],
-                                    st.session_state.get("goal", goal),
-                                    st.session_state.get("max_items", max_items),
-                                    data_samples=st.session_state.get("sample_rows", []),
-                                    user_feedback=feedback or "Please improve the plan per my comments."
-                                )
-                                new_items = plan_resp.get("eda_plan", [])
-                                version_label = f"Updated {len(plan_versions)}"
-                                plan_versions.append({"label": version_label, "items": new_items})
-                                st.session_state["plan_versions"] = plan_versions
-                                
-                                # Save new plan version to database
+                    # Approval button with better styling - centered
+                    # Only show approval buttons if no plan has been approved yet
+                    if approved_index is None:
+                        approval_col1, approval_col2, approval_col3 = st.columns([1, 2, 1])
+                        with approval_col2:
+                            # Use a simple key without session ID to avoid key conflicts
+                            if st.button(f"✅ Approve Plan {idx+1}", key=f"approve_plan_{idx}", use_container_width=True):
+                                # Save approved plan to database
                                 if "session_id" in st.session_state:
                                     history_db.save_plan_version(
                                         st.session_state["session_id"],
-                                        version_number=len(plan_versions),
-                                        plan_items=new_items,
-                                        user_feedback=feedback,
-                                        approved=False
+                                        version_number=idx+1,
+                                        plan_items=items,
+                                        approved=True
+                                    )
+                                # Store the approved index in session state for persistence
+                                st.session_state["approved_plan_index"] = idx
+                                # Clear the button interaction by adding a completion flag
+                                st.session_state["plan_approved_flag"] = True
+                                # Rerun the whole app (not just the fragment) so
+                                # the execution section below picks up the approval
+                                try:
+                                    st.rerun(scope="app")
+                                except TypeError:  # scope= needs Streamlit >= 1.37
+                                    st.rerun()
+
+                    st.markdown("---")
+
+                # Request changes form (only show if no plan approved)
+                if approved_index is None:
+                    with st.expander("🔄 Request Changes (Generate New Version)", expanded=False):
+                        st.markdown("Describe what you'd like to adjust in the analysis plan:")
+                        feedback = st.text_area("Your feedback",
+                                               placeholder="E.g., 'Focus more on correlation analysis', 'Add time series plots', 'Remove redundant visualizations'...",
+                                               key="feedback_text",
+                                               height=100)
+
+                        feedback_col1, feedback_col2, feedback_col3 = st.columns([1, 2, 1])
+                        with feedback_col2:
+                            if st.button("🔄 Generate Updated Plan", key="request_changes", use_container_width=True):
+                                with st.spinner("🤖 Generating updated plan..."):
+                                    plan_resp = orchestrator.planner.plan(
+                                        st.session_state["profile"],
+                                        st.session_state.get("goal", goal),
+                                        st.session_state.get("max_items", max_items),
+                                        data_samples=st.session_state.get("sample_rows", []),
+                                        user_feedback=feedback or "Please improve the plan per my comments."
                                     )
-                            # Immediately rerun to render the new plan version without another click
-                            st.rerun()
+                                    new_items = plan_resp.get("eda_plan", [])
+                                    version_label = f"Updated {len(plan_versions)}"
+                                    plan_versions.append({"label": version_label, "items": new_items})
+                                    st.session_state["plan_versions"] = plan_versions
 
+                                    # Save new plan version to database
+                                    if "session_id" in st.session_state:
+                                        history_db.save_plan_version(
+                                            st.session_state["session_id"],
+                                            version_number=len(plan_versions),
+                                            plan_items=new_items,
+                                            user_feedback=feedback,
+                                            approved=False
+                                        )
+                                # Rerun to render the new plan version without
+                                # another click; inside the fragment this stays
+                                # fragment-scoped and leaves Steps 1-3 alone
+                                st.rerun()
+
+            _render_plan_review()
+
+            approved_index = st.session_state.get("approved_plan_index", None)
             if approved_index is None:
                 st.info("👆 Please approve a plan version to proceed to execution.")
                 st.stop()
 
-            selected_plan_items = plan_versions[approved_index]["items"]
+            selected_plan_items = st.session_state["plan_versions"][approved_index]["items"]
 
             # Step 4: Execute per item (show plots as they are produced)
             st.markdown("## 🔄 Execution & Visualization")
@@ -1111,7 +1206,22 @@ elif uploaded_file is not None:
             highlights = []
             execution_progress = st.progress(0)
             total_items = len(selected_plan_items)
-            
+
+            # Pre-fetch every item's code concurrently: generation is a
+            # network-bound LLM call and independent per item, so the loop
+            # waits on the slowest call instead of the sum of all of them.
+            # Execution stays sequential so plots render in plan order.
+            code_pool = ThreadPoolExecutor(max_workers=min(8, max(total_items, 1)))
+            code_futures = [
+                code_pool.submit(
+                    orchestrator.coder.write_code,
+                    item,
+                    st.session_state["profile"],
+                    orchestrator.artifacts_dir,
+                )
+                for item in selected_plan_items
+            ]
+
             for i, item in enumerate(selected_plan_items, 1):
                 # Update progress
                 execution_progress.progress(i / total_items)
@@ -1124,8 +1234,8 @@ elif uploaded_file is not None:
                     st.markdown(f"**Progress:** {i}/{total_items}")
                 
                 with st.spinner("🤖 Generating code and executing..."):
-                    code_output = orchestrator.coder.write_code(item, st.session_state["profile"], orchestrator.artifacts_dir)
-                    
+                    code_output = code_futures[i - 1].result()
+
                     # Initial execution
                     exec_result = orchestrator.executor.execute(
                         code_output["python"],
@@ -1257,8 +1367,15 @@ elif uploaded_file is not None:
                                 columns_used = chart.get("columns_used", [])
                                 col_text = f" ({', '.join(columns_used)})" if columns_used else ""
                                 caption = f"Item {item.get('id', f'item_{i}')} - {chart_type.title()}{col_text}"
-                                
-                                st.image(chart_path, use_container_width=True, caption=caption)
+
+                                # Render into a placeholder so a retry can
+                                # replace the image in place instead of
+                                # appending a duplicate below it
+                                chart_slot = st.empty()
+                                chart_slot.image(
+                                    _img_bytes(chart_path, os.path.getmtime(chart_path)),
+                                    use_container_width=True, caption=caption
+                                )
                         else:
                             st.warning(f"⚠️ Image file not found: {chart_path}")
                 else:
@@ -1352,6 +1469,8 @@ elif uploaded_file is not None:
                 
                 st.markdown("---")
 
+            code_pool.shutdown(wait=False)
+
             # Step 5: Reporter
             st.markdown("## 📄 Final Report")
             st.markdown("Generating comprehensive analysis report...")